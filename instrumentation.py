@@ -0,0 +1,213 @@
+# instrumentation.py
+# Opt-in per-call metrics for the hot compute functions
+# (T_via_sieve, generate_counts, truncated_transform, generate_up_to).
+#
+# Disabled by default; the decorated functions then pay one flag check.
+# Enable with the environment variable
+#   TRUE_STRING_PROFILE=jsonl   (or 1)  -> one JSON object per call
+#   TRUE_STRING_PROFILE=prom            -> Prometheus text exposition at exit
+# and optionally TRUE_STRING_PROFILE_OUT=<path> (default: stderr), or call
+# enable() from a script's --profile flag.
+#
+# Each call records wall time, named phase timings, elements processed
+# (and elements/second), the peak RSS of the process so far (ru_maxrss) and
+# checkpoint I/O bytes. TRUE_STRING_PROFILE_MEM=1 additionally traces Python
+# allocations with tracemalloc and reports the peak since the outermost
+# instrumented call started; tracing slows allocation-heavy code by up to
+# ~10x, so timings taken with it describe the traced run, not production.
+
+import atexit
+import functools
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # non-POSIX: no peak RSS
+    resource = None
+
+_enabled = False
+_trace_memory = False
+_format = "jsonl"
+_out_path: Optional[str] = None
+_stack: List["CallRecord"] = []
+_totals: Dict[str, Dict[str, float]] = {}
+_phase_totals: Dict[tuple, float] = {}
+_owns_tracemalloc = False
+
+
+class CallRecord:
+    __slots__ = ("fn", "start", "phases", "items", "io_bytes")
+
+    def __init__(self, fn: str):
+        self.fn = fn
+        self.start = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.items = 0
+        self.io_bytes = 0
+
+
+def enable(fmt: str = "jsonl", out_path: Optional[str] = None, trace_memory: Optional[bool] = None) -> None:
+    """
+    Turn instrumentation on; fmt is 'jsonl' or 'prom'. trace_memory turns on
+    tracemalloc peaks (default: $TRUE_STRING_PROFILE_MEM).
+    """
+    global _enabled, _trace_memory, _format, _out_path
+    if fmt not in ("jsonl", "prom"):
+        raise ValueError("fmt must be 'jsonl' or 'prom'")
+    if trace_memory is None:
+        trace_memory = os.environ.get("TRUE_STRING_PROFILE_MEM", "").strip() not in ("", "0")
+    _enabled = True
+    _trace_memory = trace_memory
+    _format = fmt
+    _out_path = out_path
+
+
+def disable() -> None:
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def instrumented(name: str) -> Callable:
+    """Decorator recording one CallRecord per call of the wrapped function."""
+    def wrap(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            global _owns_tracemalloc
+            tracing = _trace_memory
+            if tracing and not _stack:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    _owns_tracemalloc = True
+                tracemalloc.reset_peak()
+            rec = CallRecord(name)
+            _stack.append(rec)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _stack.pop()
+                wall = time.perf_counter() - rec.start
+                traced = None
+                if tracing and tracemalloc.is_tracing():
+                    traced = tracemalloc.get_traced_memory()[1]
+                    if not _stack and _owns_tracemalloc:
+                        tracemalloc.stop()
+                        _owns_tracemalloc = False
+                _emit(rec, wall, _peak_rss(), traced)
+        return inner
+    return wrap
+
+
+@contextmanager
+def phase(name: str):
+    """Time a named phase of the innermost instrumented call."""
+    if not _enabled or not _stack:
+        yield
+        return
+    rec = _stack[-1]
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        rec.phases[name] = rec.phases.get(name, 0.0) + time.perf_counter() - t0
+
+
+def add_items(n: int) -> None:
+    """Count n elements processed by the innermost instrumented call."""
+    if _enabled and _stack:
+        _stack[-1].items += n
+
+
+def add_io_bytes(n: int) -> None:
+    """Count n bytes of checkpoint I/O for the innermost instrumented call."""
+    if _enabled and _stack:
+        _stack[-1].io_bytes += n
+
+
+def _peak_rss() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # KiB except on macOS
+
+
+def _emit(rec: CallRecord, wall: float, rss: Optional[int], traced: Optional[int]) -> None:
+    tot = _totals.setdefault(rec.fn, {"calls": 0, "seconds": 0.0, "items": 0, "io_bytes": 0,
+                                      "peak_rss_bytes": 0, "peak_traced_bytes": 0})
+    tot["calls"] += 1
+    tot["seconds"] += wall
+    tot["items"] += rec.items
+    tot["io_bytes"] += rec.io_bytes
+    tot["peak_rss_bytes"] = max(tot["peak_rss_bytes"], rss or 0)
+    tot["peak_traced_bytes"] = max(tot["peak_traced_bytes"], traced or 0)
+    for ph, secs in rec.phases.items():
+        _phase_totals[(rec.fn, ph)] = _phase_totals.get((rec.fn, ph), 0.0) + secs
+    if _format != "jsonl":
+        return
+    fields = {
+        "fn": rec.fn,
+        "wall_s": round(wall, 6),
+        "phases_s": {k: round(v, 6) for k, v in rec.phases.items()},
+        "items": rec.items,
+        "items_per_s": round(rec.items / wall, 1) if wall > 0 else None,
+        "peak_rss_bytes": rss,
+        "io_bytes": rec.io_bytes,
+    }
+    if traced is not None:
+        fields["peak_traced_bytes"] = traced
+    line = json.dumps(fields)
+    _write(line + "\n", "a")
+
+
+def render_prometheus() -> str:
+    """Totals of every instrumented function in Prometheus text format."""
+    lines = []
+    metrics = [
+        ("true_string_calls_total", "counter", "Instrumented calls", "calls"),
+        ("true_string_seconds_total", "counter", "Wall time spent in calls", "seconds"),
+        ("true_string_items_total", "counter", "Elements processed", "items"),
+        ("true_string_io_bytes_total", "counter", "Checkpoint I/O bytes", "io_bytes"),
+        ("true_string_peak_rss_bytes", "gauge", "Peak process RSS seen at the end of a call", "peak_rss_bytes"),
+    ]
+    if _trace_memory:
+        metrics.append(("true_string_peak_traced_bytes", "gauge", "Peak traced memory of any call", "peak_traced_bytes"))
+    for metric, kind, help_text, field in metrics:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for fn in sorted(_totals):
+            lines.append(f'{metric}{{fn="{fn}"}} {_totals[fn][field]}')
+    lines.append("# HELP true_string_phase_seconds_total Wall time per phase")
+    lines.append("# TYPE true_string_phase_seconds_total counter")
+    for (fn, ph) in sorted(_phase_totals):
+        lines.append(f'true_string_phase_seconds_total{{fn="{fn}",phase="{ph}"}} {_phase_totals[(fn, ph)]}')
+    return "\n".join(lines) + "\n"
+
+
+def _write(text: str, mode: str) -> None:
+    if _out_path:
+        with open(_out_path, mode) as fh:
+            fh.write(text)
+    else:
+        sys.stderr.write(text)
+
+
+@atexit.register
+def _flush_prometheus() -> None:
+    if _enabled and _format == "prom" and _totals:
+        _write(render_prometheus(), "w")
+
+
+_env = os.environ.get("TRUE_STRING_PROFILE", "").strip().lower()
+if _env and _env != "0":
+    enable("prom" if _env == "prom" else "jsonl", os.environ.get("TRUE_STRING_PROFILE_OUT") or None)
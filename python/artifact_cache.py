@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# artifact_cache.py
+# Content-addressed on-disk cache of f(m,n) count arrays and profiles.
+#
+# Artifacts are .npz files named <name>-<sha256 of name+params>.npz, each
+# carrying its own parameters, so `make profiles` and `make plots` (or any
+# other entry point given the same --cache-dir) share results:
+#   - grid             : canonical {m,n} pairs of a grid sorted by f value
+#   - counts           : distinct values and their multiplicities
+#   - mod_distribution : residue buckets of the distinct values mod q
+#   - divisibility     : number of distinct values divisible by p
+# A smaller grid is answered by slicing the smallest cached grid covering
+# it. The directory is kept under a byte budget by evicting least recently
+# used files (access time is recorded in the file mtime).
+
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from true_string_collision import f, mod_distribution, small_prime_divisibility
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+class ArtifactCache:
+    def __init__(self, root: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._memo: Dict[str, Dict[str, np.ndarray]] = {}
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def key(name: str, params: Dict) -> str:
+        blob = json.dumps({"name": name, "params": params}, sort_keys=True)
+        return hashlib.sha256(blob.encode()).hexdigest()
+
+    def path(self, name: str, params: Dict) -> str:
+        return os.path.join(self.root, f"{name}-{self.key(name, params)[:24]}.npz")
+
+    def get(self, name: str, params: Dict) -> Optional[Dict[str, np.ndarray]]:
+        path = self.path(name, params)
+        if path in self._memo:
+            self._touch(path)
+            return self._memo[path]
+        arrays = self._load(path)
+        if arrays is not None:
+            self._memo[path] = arrays
+        return arrays
+
+    def put(self, name: str, params: Dict, arrays: Dict[str, np.ndarray]) -> None:
+        path = self.path(name, params)
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            os.fchmod(fd, 0o666 & ~_UMASK)  # mkstemp creates 0600; the cache is shared
+            with os.fdopen(fd, "wb") as fh:
+                np.savez(fh, _params=np.array(json.dumps(params, sort_keys=True)), **arrays)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self._memo[path] = arrays
+        self.evict(keep=path)
+
+    def entries(self, name: str) -> Iterator[Tuple[Dict, str]]:
+        """Yield (params, path) for every cached artifact called name."""
+        prefix = name + "-"
+        for fn in os.listdir(self.root):
+            if not (fn.startswith(prefix) and fn.endswith(".npz")):
+                continue
+            path = os.path.join(self.root, fn)
+            try:
+                with np.load(path) as z:
+                    params = json.loads(str(z["_params"]))
+            except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+                continue
+            yield params, path
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """Remove least recently used artifacts until the budget is met."""
+        files = []
+        for fn in os.listdir(self.root):
+            if fn.endswith(".npz"):
+                path = os.path.join(self.root, fn)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._memo.pop(path, None)
+            total -= size
+
+    def _load(self, path: str) -> Optional[Dict[str, np.ndarray]]:
+        try:
+            with np.load(path) as z:
+                arrays = {k: z[k] for k in z.files if k != "_params"}
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, zipfile.BadZipFile):
+            # truncated or foreign file: drop it and recompute
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # another process dropped it first
+            return None
+        self._touch(path)
+        return arrays
+
+    @staticmethod
+    def _touch(path: str) -> None:
+        # record the access for LRU eviction
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass  # evicted by another process; the loaded arrays are still valid
+
+
+# -----------------------
+# Grids and counts
+# -----------------------
+def canonical_grid(max_m: int, max_n: int) -> Dict[str, np.ndarray]:
+    """
+    Every cell of [0,max_m] x [0,max_n] as a canonical pair a<=b (a cell
+    and its mirror share one pair), sorted by x = f(a,b).
+    """
+    m = np.arange(max_m + 1, dtype=np.int64)[:, None]
+    n = np.arange(max_n + 1, dtype=np.int64)[None, :]
+    mirror_in_grid = (n <= max_m) & (m <= max_n)
+    keep = (m <= n) | ~mirror_in_grid
+    mm, nn = np.broadcast_arrays(m, n)
+    a = np.minimum(mm, nn)[keep]
+    b = np.maximum(mm, nn)[keep]
+    x = f(a, b)
+    order = np.argsort(x, kind="stable")
+    return {"x": x[order], "a": a[order].astype(np.int32), "b": b[order].astype(np.int32)}
+
+
+def slice_counts(grid: Dict[str, np.ndarray], max_m: int, max_n: int,
+                 unordered: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """Distinct values and multiplicities of the sub-grid [0,max_m] x [0,max_n]."""
+    a = grid["a"]
+    b = grid["b"]
+    w = ((a <= max_m) & (b <= max_n)).astype(np.int64)
+    w += (a != b) & (b <= max_m) & (a <= max_n)
+    if unordered:
+        w = np.minimum(w, 1)
+    keep = w > 0
+    xs = grid["x"][keep]
+    ws = w[keep]
+    if xs.size == 0:
+        return xs, ws
+    values, first = np.unique(xs, return_index=True)
+    return values, np.add.reduceat(ws, first)
+
+
+def _covering_grid(cache: ArtifactCache, max_m: int, max_n: int) -> Dict[str, np.ndarray]:
+    best = None
+    for params, path in cache.entries("grid"):
+        if params["max_m"] >= max_m and params["max_n"] >= max_n:
+            area = (params["max_m"] + 1) * (params["max_n"] + 1)
+            if best is None or area < best[0]:
+                best = (area, params)
+    if best is not None:
+        grid = cache.get("grid", best[1])
+        if grid is not None:
+            return grid
+    params = {"max_m": max_m, "max_n": max_n}
+    grid = canonical_grid(max_m, max_n)
+    cache.put("grid", params, grid)
+    return grid
+
+
+def cached_counts(cache: ArtifactCache, max_m: int, max_n: int,
+                  unordered: bool = False) -> Dict[int, int]:
+    """Same dict as generate_counts(max_m, max_n, unordered=...), via the cache."""
+    params = {"max_m": max_m, "max_n": max_n, "unordered": unordered}
+    arrays = cache.get("counts", params)
+    if arrays is None:
+        values, counts = slice_counts(_covering_grid(cache, max_m, max_n), max_m, max_n, unordered)
+        arrays = {"values": values, "counts": counts}
+        cache.put("counts", params, arrays)
+    return dict(zip(arrays["values"].tolist(), arrays["counts"].tolist()))
+
+
+# -----------------------
+# Profiles
+# -----------------------
+def cached_mod_distribution(cache: ArtifactCache, max_m: int, max_n: int, modulus: int,
+                            counts: Optional[Dict[int, int]] = None) -> List[int]:
+    params = {"max_m": max_m, "max_n": max_n, "modulus": modulus}
+    arrays = cache.get("mod_distribution", params)
+    if arrays is None:
+        if counts is None:
+            counts = cached_counts(cache, max_m, max_n)
+        arrays = {"buckets": np.array(mod_distribution(counts, modulus), dtype=np.int64)}
+        cache.put("mod_distribution", params, arrays)
+    return arrays["buckets"].tolist()
+
+
+def cached_small_prime_divisibility(cache: ArtifactCache, max_m: int, max_n: int, primes: List[int],
+                                    counts: Optional[Dict[int, int]] = None) -> Dict[int, int]:
+    result: Dict[int, int] = {}
+    for p in primes:
+        params = {"max_m": max_m, "max_n": max_n, "p": p}
+        arrays = cache.get("divisibility", params)
+        if arrays is None:
+            if counts is None:
+                counts = cached_counts(cache, max_m, max_n)
+            arrays = {"count": np.array(small_prime_divisibility(counts, [p])[p], dtype=np.int64)}
+            cache.put("divisibility", params, arrays)
+        result[p] = int(arrays["count"])
+    return result
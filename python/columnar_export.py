@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# columnar_export.py
+# Stream T and f(m,n) collision counts to columnar files chunk by chunk,
+# never holding the whole table in memory.
+#
+#   T      : T_bits.npy (packed bitset, bitorder='little', bit n = T[n]) with
+#            T_bits.json recording the number of valid bits N+1 and, for
+#            csv/parquet/arrow, a table (n, T)
+#   counts : table (value, count, is_prime) in ascending value order; each
+#            value band is counted and flagged by a pool worker
+#   residues: table (modulus, residue, count) of the distinct values
+#
+# Formats: npy (one file per column, header patched with the final length),
+# csv, parquet and arrow (IPC file); parquet/arrow need pyarrow. npy and
+# arrow outputs can be memory-mapped by readers:
+#   np.load("out/counts/value.npy", mmap_mode="r")
+#   pyarrow.ipc.open_file(pyarrow.memory_map("out/counts.arrow")).read_all()
+#
+# Usage:
+#   python3 python/columnar_export.py T --N 100000000 --out export --formats npy,arrow
+#   python3 python/columnar_export.py counts --max-m 2000 --max-n 2000 --workers 8 --out export
+
+import os
+import sys
+import csv
+import json
+import argparse
+import multiprocessing as mp
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Allow importing top-level helpers
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from spectral_t_utils import pack_bits
+from t_store import iter_T_chunks
+from true_string_collision import is_prime, imap_bands, count_band, mod_distribution
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAVE_ARROW = True
+except Exception:
+    HAVE_ARROW = False
+
+FORMATS = ("npy", "csv", "parquet", "arrow")
+# column kind -> (array typecode, npy descr, arrow type name)
+KINDS = {
+    "int64": ("q", "<i8", "int64"),
+    "uint8": ("B", "|u1", "uint8"),
+    "bool": ("B", "|b1", "bool_"),
+}
+NPY_HEADER_SIZE = 128
+
+
+class NpyStreamWriter:
+    """A 1-D .npy file written in appended chunks; the shape is patched on close."""
+
+    def __init__(self, path: str, descr: str):
+        self.path = path
+        self.descr = descr
+        self.length = 0
+        self.fh = open(path, "wb")
+        self.fh.write(self._header())
+
+    def _header(self) -> bytes:
+        text = "{'descr': '%s', 'fortran_order': False, 'shape': (%d,), }" % (self.descr, self.length)
+        pad = NPY_HEADER_SIZE - 10 - len(text) - 1
+        return b"\x93NUMPY\x01\x00" + (NPY_HEADER_SIZE - 10).to_bytes(2, "little") + (text + " " * pad + "\n").encode()
+
+    def write(self, raw: bytes, items: int) -> None:
+        self.fh.write(raw)
+        self.length += items
+
+    def close(self) -> None:
+        self.fh.seek(0)
+        self.fh.write(self._header())
+        self.fh.close()
+
+
+class TableWriter:
+    """Append column chunks of one table to every requested format."""
+
+    def __init__(self, out_dir: str, name: str, columns: List[Tuple[str, str]], formats: Sequence[str]):
+        self.columns = columns
+        self.npy: Dict[str, NpyStreamWriter] = {}
+        self.csv_fh = None
+        self.arrow_writers = []
+        if "npy" in formats:
+            os.makedirs(os.path.join(out_dir, name), exist_ok=True)
+            for col, kind in columns:
+                self.npy[col] = NpyStreamWriter(os.path.join(out_dir, name, f"{col}.npy"), KINDS[kind][1])
+        if "csv" in formats:
+            self.csv_fh = open(os.path.join(out_dir, f"{name}.csv"), "w", newline="")
+            self.csv = csv.writer(self.csv_fh)
+            self.csv.writerow([col for col, _ in columns])
+        if "parquet" in formats or "arrow" in formats:
+            if not HAVE_ARROW:
+                raise RuntimeError("parquet/arrow export requires pyarrow")
+            self.schema = pa.schema([(col, getattr(pa, KINDS[kind][2])()) for col, kind in columns])
+            if "parquet" in formats:
+                self.arrow_writers.append(pq.ParquetWriter(os.path.join(out_dir, f"{name}.parquet"), self.schema))
+            if "arrow" in formats:
+                self.arrow_writers.append(pa.ipc.new_file(os.path.join(out_dir, f"{name}.arrow"), self.schema))
+
+    def write(self, chunk: Dict[str, Sequence[int]]) -> None:
+        for col, kind in self.columns:
+            if col in self.npy:
+                arr = array(KINDS[kind][0], chunk[col])
+                if sys.byteorder == "big":
+                    arr.byteswap()
+                self.npy[col].write(arr.tobytes(), len(arr))
+        if self.csv_fh is not None:
+            self.csv.writerows(zip(*(chunk[col] for col, _ in self.columns)))
+        if self.arrow_writers:
+            batch = pa.record_batch([pa.array(chunk[col], type=self.schema.field(col).type)
+                                     for col, _ in self.columns], schema=self.schema)
+            for w in self.arrow_writers:
+                w.write_batch(batch)
+
+    def close(self) -> None:
+        for w in self.npy.values():
+            w.close()
+        if self.csv_fh is not None:
+            self.csv_fh.close()
+        for w in self.arrow_writers:
+            w.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def export_T(N: int, out_dir: str, formats: Sequence[str], chunk: int = 1 << 22,
+             store_path: Optional[str] = None) -> None:
+    """Write T[0..N] as a packed bitset (npy) and/or an (n, T) table."""
+    if chunk % 8:
+        raise ValueError("chunk must be a multiple of 8 to pack bits across chunks")
+    os.makedirs(out_dir, exist_ok=True)
+    bits = NpyStreamWriter(os.path.join(out_dir, "T_bits.npy"), "|u1") if "npy" in formats else None
+    table_formats = [fmt for fmt in formats if fmt != "npy"]
+    table = TableWriter(out_dir, "T", [("n", "int64"), ("T", "uint8")], table_formats) if table_formats else None
+    try:
+        for lo, seg in iter_T_chunks(N, chunk, store_path):
+            if bits is not None:
+                packed = pack_bits(seg)
+                bits.write(packed, len(packed))
+            if table is not None:
+                table.write({"n": range(lo, lo + len(seg)), "T": seg})
+    finally:
+        if bits is not None:
+            bits.close()
+        if table is not None:
+            table.close()
+    if bits is not None:
+        # the last byte is zero-padded: record how many bits are valid
+        with open(os.path.join(out_dir, "T_bits.json"), "w") as fh:
+            json.dump({"nbits": N + 1, "bitorder": "little"}, fh)
+
+
+def export_band(task: Tuple) -> Tuple[List[int], List[int], List[bool], Dict[int, List[int]]]:
+    """(value, count, is_prime) columns and residue buckets of one value band."""
+    max_m, max_n, lo, hi, symmetric, mods = task
+    counts = count_band((max_m, max_n, lo, hi, symmetric))
+    values = sorted(counts)
+    return (values, [counts[x] for x in values], [is_prime(x) for x in values],
+            {q: mod_distribution(counts, q) for q in mods})
+
+
+def export_counts(max_m: int, max_n: int, out_dir: str, formats: Sequence[str], mods: List[int],
+                  workers: int = 1, bands: Optional[int] = None) -> None:
+    """Write (value, count, is_prime) band by band, then the residue profiles."""
+    os.makedirs(out_dir, exist_ok=True)
+    residues = {q: [0] * q for q in mods}
+    columns = [("value", "int64"), ("count", "int64"), ("is_prime", "bool")]
+    with TableWriter(out_dir, "counts", columns, formats) as table, mp.Pool(max(1, workers)) as pool:
+        for values, counts, flags, buckets in imap_bands(pool, export_band, max_m, max_n, bands, args=(mods,),
+                                                         prefetch=2 * max(1, workers)):
+            table.write({"value": values, "count": counts, "is_prime": flags})
+            for q in mods:
+                residues[q] = [a + b for a, b in zip(residues[q], buckets[q])]
+    rows = [(q, r, c) for q in mods for r, c in enumerate(residues[q])]
+    with TableWriter(out_dir, "residues", [("modulus", "int64"), ("residue", "int64"), ("count", "int64")],
+                     formats) as table:
+        table.write({"modulus": [r[0] for r in rows], "residue": [r[1] for r in rows], "count": [r[2] for r in rows]})
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Stream T or f(m,n) collision counts to npy/csv/parquet/arrow")
+    ap.add_argument("what", choices=["T", "counts"])
+    ap.add_argument("--out", type=str, default="export", help="Output directory")
+    ap.add_argument("--formats", type=str, default="npy,csv", help="Comma-separated subset of " + ",".join(FORMATS))
+    ap.add_argument("--N", type=int, default=1000000, help="T: export indices 0..N")
+    ap.add_argument("--chunk", type=int, default=1 << 22, help="T: indices per chunk (multiple of 8)")
+    ap.add_argument("--max-m", type=int, default=200)
+    ap.add_argument("--max-n", type=int, default=200)
+    ap.add_argument("--mods", type=str, default="3,4,8", help="counts: moduli for the residue profile table")
+    ap.add_argument("--workers", type=int, default=1, help="counts: processes for the sharded enumeration")
+    ap.add_argument("--bands", type=int, default=None, help="counts: number of value bands (chunks)")
+    args = ap.parse_args()
+
+    formats = [s.strip() for s in args.formats.split(",") if s.strip()]
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        ap.error(f"unknown formats: {', '.join(sorted(unknown))}")
+    if args.chunk <= 0 or args.chunk % 8:
+        ap.error("--chunk must be a positive multiple of 8")
+    if args.what == "T":
+        export_T(args.N, args.out, formats, args.chunk)
+    else:
+        mods = [int(s) for s in args.mods.split(",") if s.strip()]
+        export_counts(args.max_m, args.max_n, args.out, formats, mods, args.workers, args.bands)
+    print(f"Exported {args.what} to {args.out}/ ({', '.join(formats)})")
+
+
+if __name__ == "__main__":
+    main()
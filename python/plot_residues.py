@@ -2,20 +2,28 @@
 import sys
 import argparse
 import os
-from typing import Dict, List
+from typing import Dict, List, Optional
 import matplotlib.pyplot as plt
 
+# Allow importing top-level helpers
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from true_string_collision import generate_counts, mod_distribution
+from artifact_cache import ArtifactCache, cached_mod_distribution
+from t_stats import T_statistics
 
 
 def plot_mod_distribution(counts: Dict[int, int], modulus: int, out_path: str) -> None:
-    buckets = mod_distribution(counts, modulus)
-    xs = list(range(modulus))
+    plot_buckets(mod_distribution(counts, modulus), out_path, modulus)
+
+
+def plot_buckets(buckets: List[int], out_path: str, modulus: Optional[int] = None, title: Optional[str] = None,
+                 xlabel: str = "Residue", ylabel: str = "Count (distinct outputs)") -> None:
+    xs = list(range(len(buckets)))
     plt.figure(figsize=(8, 4))
     plt.bar(xs, buckets, color="#4C78A8")
-    plt.title(f"Residue distribution mod {modulus}")
-    plt.xlabel("Residue")
-    plt.ylabel("Count (distinct outputs)")
+    plt.title(title or (f"Residue distribution mod {modulus}" if modulus else "Distribution"))
+    plt.xlabel(xlabel)
+    plt.ylabel(ylabel)
     plt.tight_layout()
     plt.savefig(out_path)
     plt.close()
@@ -27,11 +35,20 @@ def main():
     ap.add_argument("--max-n", type=int, default=120)
     ap.add_argument("--mods", type=str, default="3,4,8")
     ap.add_argument("--out-dir", type=str, default="fig")
+    ap.add_argument("--symmetric", action="store_true", help="Enumerate only m<=n (same counts, ~2x less work)")
+    ap.add_argument("--cache-dir", type=str, default=None, help="Artifact cache shared with true_string_collision.py")
+    ap.add_argument("--cache-max-mb", type=int, default=512)
+    ap.add_argument("--T-N", type=int, default=0, help="Also plot residues mod each modulus and index gaps of primes 2n+1, n<=N (one popcount pass over T)")
     args = ap.parse_args()
 
     os.makedirs(args.out_dir, exist_ok=True)
 
-    counts = generate_counts(args.max_m, args.max_n)
+    cache = None
+    counts = None
+    if args.cache_dir:
+        cache = ArtifactCache(args.cache_dir, args.cache_max_mb * 1024 * 1024)
+    else:
+        counts = generate_counts(args.max_m, args.max_n, symmetric=args.symmetric)
 
     try:
         mod_list = [int(s) for s in args.mods.split(',') if s.strip()]
@@ -40,7 +57,23 @@ def main():
 
     for m in mod_list:
         out_path = os.path.join(args.out_dir, f"residues_mod_{m}.png")
-        plot_mod_distribution(counts, m, out_path)
+        if cache is not None:
+            buckets = cached_mod_distribution(cache, args.max_m, args.max_n, m)
+        else:
+            buckets = mod_distribution(counts, m)
+        plot_buckets(buckets, out_path, m)
+        print(f"Saved {out_path}")
+
+    if args.T_N > 0:
+        stats = T_statistics(args.T_N, mod_list)
+        for m in mod_list:
+            out_path = os.path.join(args.out_dir, f"T_residues_mod_{m}.png")
+            plot_buckets(stats.residue_counts[m], out_path, m,
+                         title=f"Primes 2n+1 <= {2 * args.T_N + 1} by residue mod {m}", ylabel="Count (primes)")
+            print(f"Saved {out_path}")
+        out_path = os.path.join(args.out_dir, "T_gaps.png")
+        plot_buckets(stats.gap_buckets(), out_path, title=f"Index gaps between primes 2n+1, n <= {args.T_N}",
+                     xlabel="Index gap (prime gap / 2)", ylabel="Count")
         print(f"Saved {out_path}")
 
 
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+# query_server.py
+# Long-running local server answering point questions about T and f(m,n)
+# from tables held in memory, instead of paying startup + a full re-sieve
+# per script call.
+#
+# Tables (index n <-> odd o_n = 2n+1, n in [0, N]):
+#   T      : bytearray, T[n] = 1 iff o_n is prime
+#   prefix : cumulative prime counts at every BLOCK indices (for count_T)
+#   spf    : smallest prime factor of composite o_n (0 for primes and o_0=1)
+# They take ~5 bytes per index. They are built once and grown (doubling,
+# up to --max-N) when a query needs a larger index: only the new indices
+# are sieved, in a worker thread, and concurrent queries needing the same
+# growth share it. multiplicity/preimages of c <= 2N+1 use the spf table;
+# larger c (up to (2*max_N+1)**2) are factored in a worker thread.
+#
+# Protocol: one JSON request per line, one JSON response per line.
+#   {"op": "T", "n": 5}                -> {"ok": true, "result": 1}
+#   {"op": "count_T", "N": 100}        -> number of n <= N with T[n] = 1
+#   {"op": "multiplicity", "c": 225}   -> #(m,n) with 2 f(m,n) + 1 = c
+#   {"op": "preimages", "c": 225}      -> [[m, n], ...]
+# Arguments are JSON integers (digit strings are accepted too; floats and
+# booleans are rejected). Any argument may be a list (batch); the result is
+# then a list. A line may also hold a JSON array of requests, answered by an
+# array of responses.
+# HTTP GET is accepted on the same port: GET /T?n=5, GET /count_T?N=100, ...
+#
+# Usage:
+#   python3 python/query_server.py --N 1000000 --unix /tmp/true_string.sock
+#   python3 python/query_server.py --N 1000000 --port 8765
+
+import sys
+import os
+import json
+import math
+import socket
+import asyncio
+import argparse
+from array import array
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+# Allow importing top-level helpers
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from spectral_t_utils import primes_upto, sieve_T_segment
+
+try:
+    import sympy as sp
+    HAVE_SYMPY = True
+except Exception:
+    HAVE_SYMPY = False
+
+BLOCK = 1 << 16
+ARG_NAMES = {"T": "n", "count_T": "N", "multiplicity": "c", "preimages": "c"}
+
+
+def sieve_range(lo: int, hi: int) -> Tuple[bytearray, array]:
+    """T[lo:hi] and the smallest prime factors of the composite o_n in it."""
+    base_primes = [p for p in primes_upto(math.isqrt(2*hi - 1)) if p >= 3]
+    T = sieve_T_segment(lo, hi, base_primes)
+    spf = array("I", [0]) * (hi - lo)
+    # largest base prime first, so the smallest factor is written last
+    for p in reversed(base_primes):
+        start = (p*p - 1)//2
+        if start < lo:
+            start += ((lo - start + p - 1)//p) * p
+        if start >= hi:
+            continue
+        first = start - lo
+        spf[first::p] = array("I", [p]) * len(range(first, hi - lo, p))
+    return T, spf
+
+
+class Tables:
+    def __init__(self, N: int):
+        """Sieve T, block prefix counts and smallest prime factors for n in [0, N]."""
+        self.N = -1
+        self.T = bytearray()
+        self.spf = array("I")
+        self.prefix = array("Q", [0])  # prime counts of T[0:k*BLOCK]
+        self.append(*sieve_range(0, N + 1))
+
+    def append(self, T: bytes, spf: array) -> None:
+        """Extend the tables by the segment following index N (see sieve_range)."""
+        self.T += T
+        self.spf.extend(spf)
+        for b in range((len(self.prefix) - 1) * BLOCK, len(self.T) - BLOCK + 1, BLOCK):
+            self.prefix.append(self.prefix[-1] + self.T[b:b + BLOCK].count(1))
+        self.N = len(self.T) - 1  # published last: readers never see a partial segment
+
+    def t(self, n: int) -> int:
+        return self.T[n] if n >= 0 else 0
+
+    def count_T(self, N: int) -> int:
+        if N < 0:
+            return 0
+        q = (N + 1) // BLOCK
+        return self.prefix[q] + self.T[q * BLOCK:N + 1].count(1)
+
+    def factorize(self, c: int) -> Dict[int, int]:
+        """Prime factorization of odd c with 1 <= c <= 2N+1, by SPF lookups."""
+        fac: Dict[int, int] = {}
+        while c > 1:
+            p = self.spf[(c - 1) // 2] or c
+            fac[p] = fac.get(p, 0) + 1
+            c //= p
+        return fac
+
+
+def factorize_large(c: int) -> Dict[int, int]:
+    """Prime factorization of odd c beyond the tables (sympy, else trial division)."""
+    if HAVE_SYMPY:
+        return {int(p): e for p, e in sp.factorint(c).items()}
+    fac: Dict[int, int] = {}
+    d = 3
+    while d * d <= c:
+        while c % d == 0:
+            fac[d] = fac.get(d, 0) + 1
+            c //= d
+        d += 2
+    if c > 1:
+        fac[c] = fac.get(c, 0) + 1
+    return fac
+
+
+def multiplicity(fac: Dict[int, int]) -> int:
+    # ordered preimages of c = 2 f(m,n) + 1 = (2m+3)(2n+3): d(c) - 2
+    d = 1
+    for e in fac.values():
+        d *= e + 1
+    return d - 2
+
+
+def preimages(c: int, fac: Dict[int, int]) -> List[Tuple[int, int]]:
+    divs = [1]
+    for p, e in fac.items():
+        divs = [d * p ** k for d in divs for k in range(e + 1)]
+    return [((u - 3) // 2, (c // u - 3) // 2) for u in sorted(divs) if u >= 3 and c // u >= 3]
+
+
+def parse_arg(a) -> int:
+    """A request argument: a JSON integer, or a string of decimal digits (HTTP)."""
+    if isinstance(a, int) and not isinstance(a, bool):
+        return a
+    if isinstance(a, str) and a.lstrip("-").isdigit() and a.isascii():
+        return int(a)
+    raise TypeError(f"argument must be an integer, got {a!r}")
+
+
+class QueryServer:
+    def __init__(self, N: int, max_N: int):
+        self.max_N = max_N
+        self.tables = Tables(min(N, max_N))
+        self._inflight: Dict[Tuple[str, int], asyncio.Future] = {}
+        self._growth: Optional[asyncio.Future] = None
+
+    def in_table(self, op: str, arg: int) -> bool:
+        if op in ("T", "count_T"):
+            return arg <= self.tables.N
+        return arg <= 2 * self.tables.N + 1
+
+    async def _ensure(self, index: int) -> None:
+        """Grow the tables to cover index, sharing one growth among waiters."""
+        while index > self.tables.N:
+            if index > self.max_N:
+                raise ValueError(f"index {index} beyond --max-N {self.max_N}")
+            if self._growth is None:
+                hi = min(self.max_N, max(index, 2 * self.tables.N)) + 1
+                self._growth = asyncio.ensure_future(self._grow(hi))
+                self._growth.add_done_callback(self._growth_done)
+            await asyncio.shield(self._growth)
+
+    async def _grow(self, hi: int) -> None:
+        # sieve only the new indices off the event loop, then append them
+        loop = asyncio.get_running_loop()
+        self.tables.append(*await loop.run_in_executor(None, sieve_range, self.tables.N + 1, hi))
+
+    def _growth_done(self, fut: asyncio.Future) -> None:
+        self._growth = None
+
+    async def _factorize(self, c: int) -> Dict[int, int]:
+        if c > (2 * self.max_N + 1) ** 2:
+            raise ValueError(f"c {c} beyond (2*max_N+1)**2 = {(2 * self.max_N + 1) ** 2}")
+        if c <= 2 * self.tables.N + 1:
+            return self.tables.factorize(c)
+        return await asyncio.get_running_loop().run_in_executor(None, factorize_large, c)
+
+    async def answer(self, op: str, arg: int):
+        if op not in ARG_NAMES:
+            raise ValueError(f"unknown op {op!r}")
+        if op == "T":
+            await self._ensure(arg)
+            return self.tables.t(arg)
+        if op == "count_T":
+            await self._ensure(arg)
+            return self.tables.count_T(arg)
+        if arg < 9 or arg % 2 == 0:
+            return 0 if op == "multiplicity" else []
+        fac = await self._factorize(arg)
+        if op == "multiplicity":
+            return multiplicity(fac)
+        return preimages(arg, fac)
+
+    async def query(self, op: str, arg: int):
+        if self.in_table(op, arg):
+            return await self.answer(op, arg)  # in-table: answer directly
+        key = (op, arg)
+        fut = self._inflight.get(key)
+        if fut is not None:
+            return await asyncio.shield(fut)
+        fut = asyncio.ensure_future(self.answer(op, arg))
+        self._inflight[key] = fut
+        try:
+            return await fut
+        finally:
+            del self._inflight[key]
+
+    async def handle(self, req: Dict) -> Dict:
+        if not isinstance(req, dict):
+            return {"ok": False, "error": "request must be an object"}
+        try:
+            op = req.get("op")
+            if op not in ARG_NAMES:
+                raise ValueError(f"unknown op {op!r}")
+            arg = req.get(ARG_NAMES[op])
+            if isinstance(arg, list):
+                args = [parse_arg(a) for a in arg]
+                result = await asyncio.gather(*(self.query(op, a) for a in args))
+            else:
+                result = await self.query(op, parse_arg(arg))
+            return {"ok": True, "result": result}
+        except (TypeError, ValueError, KeyError, OverflowError) as e:
+            return {"ok": False, "error": str(e)}
+
+    async def handle_line(self, line: bytes) -> bytes:
+        try:
+            req = json.loads(line)
+        except (ValueError, RecursionError) as e:
+            return _dumps({"ok": False, "error": f"bad json: {e}"})
+        if isinstance(req, list):
+            return _dumps(await asyncio.gather(*(self.handle(r) for r in req)))
+        if not isinstance(req, dict):
+            return _dumps({"ok": False, "error": "request must be an object or array"})
+        return _dumps(await self.handle(req))
+
+    async def handle_http(self, line: bytes, reader: asyncio.StreamReader) -> bytes:
+        while (await reader.readline()).strip():
+            pass  # skip headers
+        parts = line.decode("latin-1").split()
+        url = urlsplit(parts[1] if len(parts) > 1 else "/")
+        req = {"op": url.path.strip("/")}
+        for k, vals in parse_qs(url.query).items():
+            vals = [v for val in vals for v in val.split(",")]
+            req[k] = vals if len(vals) > 1 else vals[0]
+        resp = await self.handle(req)
+        body = json.dumps(resp).encode()
+        status = "200 OK" if resp["ok"] else "400 Bad Request"
+        return (f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode() + body
+
+    async def serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:  # longer than the stream limit: cannot resync
+                    writer.write(_dumps({"ok": False, "error": "request line too long"}))
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                if line.startswith(b"GET "):
+                    writer.write(await self.handle_http(line, reader))
+                    await writer.drain()
+                    break
+                if not line.strip():
+                    continue
+                writer.write(await self.handle_line(line))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+def _dumps(obj) -> bytes:
+    return json.dumps(obj, separators=(",", ":")).encode() + b"\n"
+
+
+def query(address: str, op: str, arg, timeout: float = 30.0):
+    """
+    Blocking client: address is a Unix socket path or 'host:port'.
+    Returns the result of one request (a list when arg is a list).
+    """
+    if ":" in address and not os.path.exists(address):
+        host, port = address.rsplit(":", 1)
+        sock = socket.create_connection((host, int(port)), timeout)
+    else:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        sock.connect(address)
+    with sock, sock.makefile("rwb") as fh:
+        fh.write(_dumps({"op": op, ARG_NAMES[op]: arg}))
+        fh.flush()
+        resp = json.loads(fh.readline())
+    if not resp["ok"]:
+        raise ValueError(resp["error"])
+    return resp["result"]
+
+
+async def serve(args) -> None:
+    print(f"Building tables up to N={args.N} ...", flush=True)
+    server = QueryServer(args.N, args.max_N)
+    if args.unix:
+        if os.path.exists(args.unix):
+            os.remove(args.unix)
+        srv = await asyncio.start_unix_server(server.serve_client, path=args.unix)
+        where = args.unix
+    else:
+        srv = await asyncio.start_server(server.serve_client, host="127.0.0.1", port=args.port)
+        where = f"127.0.0.1:{args.port}"
+    print(f"Serving T/count_T/multiplicity/preimages on {where}", flush=True)
+    async with srv:
+        await srv.serve_forever()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Serve T(n), count_T(N), multiplicity(c) and preimages(c) from in-memory tables")
+    ap.add_argument("--N", type=int, default=1000000, help="Initial table size (indices 0..N)")
+    ap.add_argument("--max-N", type=int, default=1 << 26,
+                    help="Never grow the tables beyond this index (~5 bytes of memory per index); "
+                         "multiplicity/preimages accept c <= (2*max_N+1)**2")
+    ap.add_argument("--unix", type=str, default=None, help="Listen on this Unix socket path")
+    ap.add_argument("--port", type=int, default=8765, help="Listen on 127.0.0.1:PORT (when --unix is not given)")
+    args = ap.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 #!/usr/bin/env python3
+import os
 import sys
 import math
 from typing import List
@@ -8,26 +9,36 @@ from mpmath import mp, zetazero
 
 # Allow importing top-level helpers
 sys.path.append('/workspace')
-from spectral_t_utils import T_via_sieve
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from t_store import load_T
+from instrumentation import instrumented, phase as timed_phase, add_items, enable as enable_profiling
 
 
+@instrumented("truncated_transform")
 def truncated_transform(T: List[int], xi: float) -> complex:
     # Compute S_N(xi) = sum_{n=1..N} T[n] * exp(-2 pi i (2n+1) xi)
     N = len(T) - 1
     if N <= 1:
         return 0
-    n = np.arange(1, N + 1, dtype=np.float64)
-    # phase = -2πi * (2n+1) * xi
-    phase = -2.0 * math.pi * 1j * ((2.0 * n + 1.0) * xi)
-    return np.sum(T[1:] * np.exp(phase))
+    add_items(N)
+    with timed_phase("phases"):
+        n = np.arange(1, N + 1, dtype=np.float64)
+        # phase = -2πi * (2n+1) * xi
+        phase = -2.0 * math.pi * 1j * ((2.0 * n + 1.0) * xi)
+    with timed_phase("sum"):
+        return np.sum(T[1:] * np.exp(phase))
 
 
 def main():
-    N = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
-    K = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    argv = sys.argv[1:]
+    if "--profile" in argv:
+        argv.remove("--profile")
+        enable_profiling("jsonl", os.environ.get("TRUE_STRING_PROFILE_OUT") or None)
+    N = int(argv[0]) if len(argv) > 0 else 200000
+    K = int(argv[1]) if len(argv) > 1 else 10
 
     print(f"Building T up to N={N} ...")
-    T = T_via_sieve(N)
+    T = load_T(N)  # reuses $TRUE_STRING_T_STORE when set
 
     mp.dps = 50
     zeros = [zetazero(k+1) for k in range(K)]  # returns 1/2 + i*gamma_k
@@ -1,8 +1,57 @@
 #!/usr/bin/env python3
+import os
 import sys
 import argparse
+import importlib.util
 import math
-from typing import Dict, Tuple, List
+import multiprocessing as mp
+import warnings
+from collections import deque
+from contextlib import nullcontext
+from typing import Dict, Iterator, Tuple, List, Optional
+
+
+def _import_instrumentation():
+    # instrumentation.py lives in the repository root, which is not on sys.path
+    # when this module is run as a script or imported from python/; load it
+    # from there by path and register it, so every importer shares one module.
+    try:
+        import instrumentation
+        return instrumentation
+    except ImportError:
+        pass
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "instrumentation.py")
+    if not os.path.exists(path):
+        return None
+    spec = importlib.util.spec_from_file_location("instrumentation", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["instrumentation"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+_instrumentation = _import_instrumentation()
+if _instrumentation is not None:
+    instrumented = _instrumentation.instrumented
+    phase = _instrumentation.phase
+    add_items = _instrumentation.add_items
+    enable_profiling = _instrumentation.enable
+else:  # installed without the repository root: run uninstrumented
+    if os.environ.get("TRUE_STRING_PROFILE", "").strip() not in ("", "0"):
+        warnings.warn("TRUE_STRING_PROFILE is set but instrumentation.py was not found; profiling is off")
+
+    def instrumented(name):
+        return lambda fn: fn
+
+    def phase(name):
+        return nullcontext()
+
+    def add_items(n):
+        pass
+
+    def enable_profiling(*args, **kwargs):
+        raise RuntimeError("profiling needs instrumentation.py from the repository root")
+
 
 try:
     import sympy as sp
@@ -29,15 +78,83 @@ def is_prime(n: int) -> bool:
     return True
 
 
-def generate_counts(max_m: int, max_n: int) -> Dict[int, int]:
+def row_spans(m: int, max_m: int, max_n: int, m_start: int = 0,
+              unordered: bool = False) -> List[Tuple[int, int, int]]:
+    """
+    Column spans (n_lo, n_hi, weight) to visit in row m of the grid
+    [0,max_m] x [0,max_n] when exploiting f(m,n) == f(n,m).
+
+    Off-diagonal cells (m,n) with n > m stand in for their mirror (n,m)
+    whenever the mirror lies in the grid; they carry weight 2 for ordered
+    counts (1 when unordered=True). Cells whose mirror falls outside the
+    grid are visited directly with weight 1. Rows below m_start are taken
+    to have been enumerated already without mirroring (incremental use),
+    so their mirrors in row m are visited directly.
+    """
+    if m > max_n:
+        return [(0, max_n, 1)]
+    spans: List[Tuple[int, int, int]] = []
+    if m_start > 0:
+        spans.append((0, min(m_start, m) - 1, 1))
+    spans.append((m, m, 1))
+    mirrored_hi = min(max_n, max_m)
+    if mirrored_hi > m:
+        spans.append((m + 1, mirrored_hi, 1 if unordered else 2))
+    if max_n > max(m, max_m):
+        spans.append((max(m, max_m) + 1, max_n, 1))
+    return [s for s in spans if s[0] <= s[1]]
+
+
+def symmetric_row_spans(max_m: int, max_n: int, m_start: int = 0,
+                        unordered: bool = False) -> Iterator[Tuple[int, int, int, int]]:
+    """Yield (m, n_lo, n_hi, weight) covering rows m_start..max_m; see row_spans."""
+    for m in range(m_start, max_m + 1):
+        for n_lo, n_hi, w in row_spans(m, max_m, max_n, m_start, unordered):
+            yield m, n_lo, n_hi, w
+
+
+@instrumented("generate_counts")
+def generate_counts(max_m: int, max_n: int, symmetric: bool = False,
+                    unordered: bool = False) -> Dict[int, int]:
+    """
+    Count preimages of each value of f over m in [0,max_m], n in [0,max_n].
+
+    symmetric=True only visits m <= n inside the square part of the grid
+    and weights mirrored cells, halving the work on square grids while
+    producing the same dict. unordered=True (implies symmetric) counts
+    {m,n} pairs instead of ordered (m,n) pairs.
+    """
     counts: Dict[int, int] = {}
-    for m in range(0, max_m + 1):
-        for n in range(0, max_n + 1):
-            x = f(m, n)
-            counts[x] = counts.get(x, 0) + 1
+    with phase("enumerate"):
+        if not (symmetric or unordered):
+            for m in range(0, max_m + 1):
+                for n in range(0, max_n + 1):
+                    x = f(m, n)
+                    counts[x] = counts.get(x, 0) + 1
+            add_items((max_m + 1) * (max_n + 1))
+            return counts
+        for m, n_lo, n_hi, w in symmetric_row_spans(max_m, max_n, unordered=unordered):
+            step = 3 + 2*m
+            for x in range(f(m, n_lo), f(m, n_hi) + 1, step):
+                counts[x] = counts.get(x, 0) + w
+            add_items(n_hi - n_lo + 1)
     return counts
 
 
+def preimage_count(x: int, max_m: int, max_n: int, unordered: bool = False) -> int:
+    """
+    Number of (m,n) in the grid with f(m,n) == x ({m,n} pairs if unordered),
+    testing each symmetric row span arithmetically instead of cell by cell.
+    """
+    cnt = 0
+    for m, n_lo, n_hi, w in symmetric_row_spans(max_m, max_n, unordered=unordered):
+        step = 3 + 2*m
+        lo = f(m, n_lo)
+        if lo <= x <= f(m, n_hi) and (x - lo) % step == 0:
+            cnt += w
+    return cnt
+
+
 def summarize(counts: Dict[int, int]) -> Tuple[int, int, int, int]:
     total = len(counts)
     collisions = sum(1 for v in counts.values() if v >= 2)
@@ -70,6 +187,144 @@ def small_prime_divisibility(counts: Dict[int, int], primes: List[int]) -> Dict[
     return result
 
 
+# -----------------------
+# Sharded (multi-process) profiling
+# -----------------------
+# The value range [f(0,0), f(max_m,max_n)] is split into bands holding about
+# the same number of grid cells. One pool task handles one whole band: it
+# walks the cells of every row whose value falls inside the band (an
+# arithmetic n-range per row), so it holds the exact counts of that band only,
+# and reduces them to band statistics itself. Only those small dicts travel
+# back to the parent. Bands are disjoint in value, so the summed statistics
+# equal summarize(), mod_distribution() and small_prime_divisibility() of the
+# whole grid.
+
+MAX_BAND_PAIRS = 1 << 21
+
+
+def _cells_below(Y: float, max_m: int, max_n: int) -> float:
+    """
+    Approximate number of cells with (2m+3)(2n+3) < Y: the area under the
+    hyperbola uv = Y inside [2, 2*max_m+4] x [2, 2*max_n+4], divided by 4
+    (cell (u, v) owns the 2x2 square around it).
+    """
+    a1, a2 = 2.0, 2.0*max_m + 4
+    b1, b2 = 2.0, 2.0*max_n + 4
+    u_full = min(max(Y / b2, a1), a2)  # columns left of u_full lie wholly below
+    u_end = min(max(Y / b1, a1), a2)
+    area = (b2 - b1) * (u_full - a1) + Y * math.log(u_end / u_full) - b1 * (u_end - u_full)
+    return area / 4
+
+
+def value_bands(max_m: int, max_n: int, bands: int) -> List[Tuple[int, int]]:
+    """
+    Split [f(0,0), f(max_m,max_n)] into at most `bands` half-open value ranges
+    holding about the same number of grid cells. f values crowd at the low
+    end, so the edges sit at quantiles of #{(m,n): f(m,n) < X}, found by
+    bisection on the closed form _cells_below (within ~1% of the exact count
+    on large grids).
+    """
+    lo = f(0, 0)
+    top = f(max_m, max_n) + 1
+    bands = max(1, bands)
+    total = (max_m + 1) * (max_n + 1)
+    edges = [lo]
+    for k in range(1, bands):
+        target = k * total / bands
+        a, b = edges[-1], top
+        while a < b:
+            mid = (a + b) // 2
+            # f(m,n) < X  <=>  (2m+3)(2n+3) <= 2X - 1
+            if _cells_below(2*mid, max_m, max_n) < target:
+                a = mid + 1
+            else:
+                b = mid
+        if edges[-1] < a < top:
+            edges.append(a)
+    edges.append(top)
+    return list(zip(edges, edges[1:]))
+
+
+def count_band(task: Tuple[int, int, int, int, bool]) -> Dict[int, int]:
+    """Exact counts of the values in [lo, hi) over the whole grid."""
+    max_m, max_n, lo, hi, symmetric = task
+    counts: Dict[int, int] = {}
+    for m in range(0, max_m + 1):
+        f0 = f(m, 0)
+        if f0 >= hi:
+            break  # f(m,0) grows with m
+        step = 3 + 2*m
+        first = max(0, -((f0 - lo) // step))  # ceil((lo - f0) / step)
+        last = (hi - 1 - f0) // step
+        spans = row_spans(m, max_m, max_n) if symmetric else [(0, max_n, 1)]
+        for n_lo, n_hi, w in spans:
+            a = max(n_lo, first)
+            b = min(n_hi, last)
+            for x in range(f0 + a*step, f0 + b*step + 1, step):
+                counts[x] = counts.get(x, 0) + w
+    return counts
+
+
+def imap_bands(pool, fn, max_m: int, max_n: int, bands: Optional[int] = None, symmetric: bool = True,
+               args: Tuple = (), prefetch: int = 2) -> Iterator:
+    """
+    Yield fn((max_m, max_n, lo, hi, symmetric) + args) for consecutive value
+    bands in ascending order, one pool task per band, with at most
+    `prefetch` tasks in flight. bands defaults to ~MAX_BAND_PAIRS cells each.
+    """
+    if bands is None:
+        bands = -(-((max_m + 1) * (max_n + 1)) // MAX_BAND_PAIRS)
+    pending: deque = deque()
+    for lo, hi in value_bands(max_m, max_n, bands):
+        pending.append(pool.apply_async(fn, ((max_m, max_n, lo, hi, symmetric) + tuple(args),)))
+        if len(pending) >= prefetch:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def band_stats(counts: Dict[int, int], mods: List[int], divisors: List[int], head: int) -> Dict:
+    """summarize / mod_distribution / small_prime_divisibility of one band."""
+    return {
+        "summary": summarize(counts),
+        "mods": {q: mod_distribution(counts, q) for q in mods},
+        "divisibility": small_prime_divisibility(counts, divisors),
+        "head": sorted(counts.items())[:head] if head > 0 else [],
+    }
+
+
+def profile_band(task: Tuple) -> Dict:
+    """count_band followed by band_stats, both in the worker."""
+    max_m, max_n, lo, hi, symmetric, mods, divisors, head = task
+    return band_stats(count_band((max_m, max_n, lo, hi, symmetric)), mods, divisors, head)
+
+
+def sharded_profile(max_m: int, max_n: int, mods: List[int], divisors: List[int], workers: int,
+                    head: int = 0, bands: Optional[int] = None, symmetric: bool = True) -> Dict:
+    """
+    Same statistics as the single-process path, computed band by band on
+    `workers` processes. Returns a dict with keys summary, mods,
+    divisibility and head (the first `head` sorted (value, count)).
+    """
+    result = {
+        "summary": (0, 0, 0, 0),
+        "mods": {q: [0] * q for q in mods},
+        "divisibility": {p: 0 for p in divisors},
+        "head": [],
+    }
+    with mp.Pool(workers) as pool:
+        for part in imap_bands(pool, profile_band, max_m, max_n, bands, symmetric,
+                               args=(mods, divisors, head), prefetch=2 * workers):
+            result["summary"] = tuple(a + b for a, b in zip(result["summary"], part["summary"]))
+            for q, buckets in part["mods"].items():
+                result["mods"][q] = [a + b for a, b in zip(result["mods"][q], buckets)]
+            for p, c in part["divisibility"].items():
+                result["divisibility"][p] += c
+            if len(result["head"]) < head:
+                result["head"].extend(part["head"][:head - len(result["head"])])
+    return result
+
+
 def main():
     ap = argparse.ArgumentParser(description="Generate collision-zero True String counts for f(m,n)=4+3m+3n+2mn")
     ap.add_argument("--max-m", type=int, default=200, help="Maximum m")
@@ -77,10 +332,43 @@ def main():
     ap.add_argument("--mods", type=str, default="3,4,8", help="Comma-separated moduli for residue analysis (e.g. 3,4,8,5)")
     ap.add_argument("--divisible-by", type=str, default="2,3,5,7,11", help="Comma-separated small primes for divisibility counts")
     ap.add_argument("--list-first", type=int, default=0, help="List first K sorted entries with (value, count)")
+    ap.add_argument("--symmetric", action="store_true", help="Enumerate only m<=n and weight mirrored cells (same output, ~2x less work)")
+    ap.add_argument("--cache-dir", type=str, default=None, help="Reuse/store count arrays and profiles in this artifact cache directory")
+    ap.add_argument("--cache-max-mb", type=int, default=512, help="Size budget of the artifact cache (LRU eviction)")
+    ap.add_argument("--workers", type=int, default=0, help="Sharded mode: profile value bands on this many processes (0 = single process)")
+    ap.add_argument("--bands", type=int, default=None, help="Sharded mode: number of value bands (default: ~%d pairs per band)" % MAX_BAND_PAIRS)
+    ap.add_argument("--profile", nargs="?", const="jsonl", choices=["jsonl", "prom"], default=None,
+                    help="Record per-call timings/memory (JSON lines or Prometheus text) to stderr or $TRUE_STRING_PROFILE_OUT")
     args = ap.parse_args()
 
-    counts = generate_counts(args.max_m, args.max_n)
-    total, collisions, unique_primes, unique_nonprimes = summarize(counts)
+    if args.profile:
+        enable_profiling(args.profile, os.environ.get("TRUE_STRING_PROFILE_OUT") or None)
+
+    try:
+        mod_list = [int(s) for s in args.mods.split(',') if s.strip()]
+    except Exception:
+        mod_list = [3, 4, 8]
+    try:
+        divisors = [int(s) for s in args.divisible_by.split(',') if s.strip()]
+    except Exception:
+        divisors = [2, 3, 5, 7, 11]
+
+    cache = None
+    sharded = None
+    if args.cache_dir:
+        from artifact_cache import (ArtifactCache, cached_counts, cached_mod_distribution,
+                                    cached_small_prime_divisibility)
+        cache = ArtifactCache(args.cache_dir, args.cache_max_mb * 1024 * 1024)
+        counts = cached_counts(cache, args.max_m, args.max_n)
+    elif args.workers > 0:
+        sharded = sharded_profile(args.max_m, args.max_n, mod_list, divisors, args.workers,
+                                  head=args.list_first, bands=args.bands, symmetric=True)
+    else:
+        counts = generate_counts(args.max_m, args.max_n, symmetric=args.symmetric)
+    if sharded is not None:
+        total, collisions, unique_primes, unique_nonprimes = sharded["summary"]
+    else:
+        total, collisions, unique_primes, unique_nonprimes = summarize(counts)
 
     print(f"f(m,n)=4+3m+3n+2mn over m in [0,{args.max_m}], n in [0,{args.max_n}]")
     print(f"Distinct values             : {total}")
@@ -89,30 +377,34 @@ def main():
     print(f"Unique non-primes           : {unique_nonprimes}")
 
     # Residue distributions
-    try:
-        mod_list = [int(s) for s in args.mods.split(',') if s.strip()]
-    except Exception:
-        mod_list = [3, 4, 8]
     for m in mod_list:
-        buckets = mod_distribution(counts, m)
+        if sharded is not None:
+            buckets = sharded["mods"][m]
+        elif cache is not None:
+            buckets = cached_mod_distribution(cache, args.max_m, args.max_n, m, counts)
+        else:
+            buckets = mod_distribution(counts, m)
         bucket_str = ", ".join(f"r{r}={buckets[r]}" for r in range(len(buckets)))
         print(f"Modulo {m} distribution among distinct outputs: {bucket_str}")
 
     # Small prime divisibility among distinct outputs
-    try:
-        divisors = [int(s) for s in args.divisible_by.split(',') if s.strip()]
-    except Exception:
-        divisors = [2, 3, 5, 7, 11]
-    div_stats = small_prime_divisibility(counts, divisors)
+    if sharded is not None:
+        div_stats = sharded["divisibility"]
+    elif cache is not None:
+        div_stats = cached_small_prime_divisibility(cache, args.max_m, args.max_n, divisors, counts)
+    else:
+        div_stats = small_prime_divisibility(counts, divisors)
     for p in divisors:
         print(f"Divisible by {p}: {div_stats.get(p, 0)}")
 
     if args.list_first > 0:
-        items = sorted(counts.items())[:args.list_first]
+        if sharded is not None:
+            items = sharded["head"]
+        else:
+            items = sorted(counts.items())[:args.list_first]
         print("First entries (x: count):")
         for x, c in items:
             print(f"  {x}: {c}")
 
-
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,11 +1,14 @@
 #!/usr/bin/env python3
+import os
 import sys
 import math
 from typing import List
 
 # Allow importing top-level helpers
 sys.path.append('/workspace')
-from spectral_t_utils import T_via_sieve, progression_marking_T, T_from_formula, primes_upto
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from spectral_t_utils import T_from_formula, primes_upto, sieve_T_segment, progression_marking_segment
+from t_store import TStore, ENV_VAR
 
 try:
     import sympy as sp
@@ -26,35 +29,86 @@ def naive_is_prime(n: int) -> bool:
     return True
 
 
-def verify_equivalence(N: int, p_max: int | None = None) -> None:
-    print(f"Verifying T up to N={N} ...")
-    T_sieve = T_via_sieve(N)
-    T_prog = progression_marking_T(N, p_max)
+def sample_indices(N: int) -> List[int]:
+    # small sample from head, middle and tail
+    sample_points = list(range(0, min(N, 2000)))
+    sample_points += [N//2 + i for i in range(-100, 100) if 0 <= N//2 + i <= N]
+    sample_points += [N - i for i in range(0, min(1000, N + 1))]
+    return sorted(set(sample_points))
+
+
+def _diff_indices(a: bytes, b: bytes, lo: int, limit: int) -> List[tuple]:
+    # Locate differing bytes, comparing 4 KiB blocks wholesale first.
+    out = []
+    for s in range(0, len(a), 4096):
+        if a[s:s + 4096] == b[s:s + 4096]:
+            continue
+        for i in range(s, min(s + 4096, len(a))):
+            if a[i] != b[i]:
+                out.append((lo + i, a[i], b[i]))
+                if len(out) >= limit:
+                    return out
+    return out
+
+
+def verify_equivalence_streaming(N: int, p_max: int | None = None, chunk: int = 1 << 22,
+                                 max_mismatches: int = 10) -> bool:
+    """
+    Check T[0..N] without materialising it: the sieve (or the T store
+    named by $TRUE_STRING_T_STORE) and the progression method are produced
+    chunk by chunk and compared blockwise, stopping after max_mismatches
+    differences. Only base primes <= sqrt(2N+1) are generated; they also
+    drive T_from_formula on the sampled indices. Returns True when all
+    checks pass. With p_max given, progression marking is partial by design,
+    so its mismatches are reported but only the primality oracle and the
+    single-index formula decide the result.
+    """
+    print(f"Verifying T up to N={N} (streaming, chunk={chunk}) ...")
+    root = int(math.isqrt(2 * N + 1))
+    base_primes = primes_upto(root)
+    prog_primes = base_primes if p_max is None else [p for p in base_primes if p <= p_max]
+    sample_points = sample_indices(N)
+    samples: dict = {}
 
-    # Equivalence between sieve and progression methods
-    mismatches = [(i, T_sieve[i], T_prog[i]) for i in range(N + 1) if T_sieve[i] != T_prog[i]]
+    if os.environ.get(ENV_VAR):
+        store = TStore(os.environ[ENV_VAR])
+        store.extend(N)
+        sieve_chunks = store.iter_chunks(0, N + 1, chunk)
+    else:
+        sieve_chunks = ((lo, sieve_T_segment(lo, min(lo + chunk, N + 1), base_primes))
+                        for lo in range(0, N + 1, chunk))
+
+    mismatches: List[tuple] = []
+    si = 0
+    for lo, seg_sieve in sieve_chunks:
+        hi = lo + len(seg_sieve)
+        seg_prog = progression_marking_segment(lo, hi, prog_primes)
+        if seg_sieve != seg_prog:
+            mismatches += _diff_indices(seg_sieve, seg_prog, lo, max_mismatches - len(mismatches))
+        while si < len(sample_points) and sample_points[si] < hi:
+            samples[sample_points[si]] = seg_sieve[sample_points[si] - lo]
+            si += 1
+        if len(mismatches) >= max_mismatches:
+            break
     if mismatches:
-        print(f"Mismatch between sieve and progression at {len(mismatches)} indices. Example: {mismatches[:5]}")
+        note = " (stopped early)" if len(mismatches) >= max_mismatches else ""
+        print(f"Mismatch between sieve and progression at {len(mismatches)} indices{note}. Example: {mismatches[:5]}")
+        if p_max is not None:
+            print(f"(Expected: progressions only use primes p <= {p_max}.)")
     else:
         print("Sieve and progression methods agree for all indices.")
 
-    # Spot-check against primality oracle for odd values
-    sample_points = list(range(0, min(N, 2000)))  # small sample from head
-    sample_points += [N//2 + i for i in range(-100, 100) if 0 <= N//2 + i <= N]
-    sample_points += [N - i for i in range(0, min(1000, N + 1))]
-    sample_points = sorted(set(sample_points))
+    # sample points past an early exit are sieved individually
+    for n in sample_points[si:]:
+        samples[n] = sieve_T_segment(n, n + 1, base_primes)[0]
 
     failures = []
     for n in sample_points:
         odd = 2 * n + 1
-        t = T_sieve[n]
-        if HAVE_SYMPY:
-            oracle = 1 if sp.isprime(odd) else 0
-        else:
-            oracle = 1 if naive_is_prime(odd) else 0
-        if t != oracle:
-            failures.append((n, odd, t, oracle))
-            if len(failures) >= 10:
+        oracle = 1 if (sp.isprime(odd) if HAVE_SYMPY else naive_is_prime(odd)) else 0
+        if samples[n] != oracle:
+            failures.append((n, odd, samples[n], oracle))
+            if len(failures) >= max_mismatches:
                 break
     if failures:
         print("Disagreement with primality oracle at examples:")
@@ -63,14 +117,12 @@ def verify_equivalence(N: int, p_max: int | None = None) -> None:
     else:
         print("All sampled indices agree with the primality oracle.")
 
-    # Single-index formula tests
-    primes_list = primes_upto(2 * N + 1)
     single_mismatches = []
     for n in sample_points:
-        val = T_from_formula(n, primes_list)
-        if val != T_sieve[n]:
-            single_mismatches.append((n, val, T_sieve[n]))
-            if len(single_mismatches) >= 10:
+        val = T_from_formula(n, base_primes)
+        if val != samples[n]:
+            single_mismatches.append((n, val, samples[n]))
+            if len(single_mismatches) >= max_mismatches:
                 break
     if single_mismatches:
         print("T_from_formula disagrees at examples:")
@@ -78,11 +130,20 @@ def verify_equivalence(N: int, p_max: int | None = None) -> None:
             print(f"  n={e[0]}: formula={e[1]}, sieve={e[2]}")
     else:
         print("Single-index formula agrees on sampled indices.")
+    return not ((mismatches and p_max is None) or failures or single_mismatches)
+
+
+def verify_equivalence(N: int, p_max: int | None = None) -> bool:
+    """Compare the sieve and progression methods for T[0..N]; see verify_equivalence_streaming."""
+    return verify_equivalence_streaming(N, p_max)
 
 
+# Usage: verify_T.py [N] [p_max]. Exits with 1 when a check fails; with p_max,
+# sieve/progression mismatches are expected and only reported.
 if __name__ == "__main__":
     N = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
     p_max = None
     if len(sys.argv) > 2:
         p_max = int(sys.argv[2])
-    verify_equivalence(N, p_max)
\ No newline at end of file
+    ok = verify_equivalence(N, p_max)
+    sys.exit(0 if ok else 1)
\ No newline at end of file
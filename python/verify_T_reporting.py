@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# Check the reporting of verify_T.py's streaming verifier: early exit after
+# max_mismatches, the reported examples, the "stopped early" note, the
+# p_max policy (partial marking is reported, not failed) and the exit code
+# when the sieve itself is wrong (a corrupted T store).
+import io
+import os
+import sys
+import tempfile
+import subprocess
+from contextlib import redirect_stdout
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from spectral_t_utils import T_via_sieve, progression_marking_T
+from t_store import TStore, HEADER_SIZE, ENV_VAR
+from verify_T import verify_equivalence_streaming
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def run(*args, **kwargs):
+    out = io.StringIO()
+    with redirect_stdout(out):
+        ok = verify_equivalence_streaming(*args, **kwargs)
+    return ok, out.getvalue()
+
+
+def main():
+    failures = []
+    os.environ.pop(ENV_VAR, None)
+
+    # partial marking: many mismatches, early exit after K, still a pass
+    N, p_max, K = 3000, 5, 5
+    T, P = T_via_sieve(N), progression_marking_T(N, p_max)
+    diff = [(n, T[n], P[n]) for n in range(N + 1) if T[n] != P[n]]
+    for chunk in (8, 256, 1000, 1 << 22):
+        ok, out = run(N, p_max, chunk=chunk, max_mismatches=K)
+        if not ok or f"at {K} indices (stopped early). Example: {diff[:K]}" not in out \
+                or f"p <= {p_max}" not in out:
+            failures.append(("early exit", chunk, out))
+
+    # fewer mismatches than K: no early-exit note
+    N, p_max = 30, 3
+    T, P = T_via_sieve(N), progression_marking_T(N, p_max)
+    diff = [(n, T[n], P[n]) for n in range(N + 1) if T[n] != P[n]]
+    ok, out = run(N, p_max, chunk=8, max_mismatches=10)
+    if not ok or f"at {len(diff)} indices. Example: {diff[:5]}" not in out or "stopped early" in out:
+        failures.append(("short report", out))
+
+    # full marking agrees
+    ok, out = run(50000, chunk=4096)
+    if not ok or "agree for all indices" not in out:
+        failures.append(("full marking", out))
+
+    # a corrupted sieve (T store) fails, and verify_T.py exits with 1
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "T.store")
+        TStore(path).extend(5000)
+        with open(path, "r+b") as fh:
+            fh.seek(HEADER_SIZE + 10)  # o_10 = 21 is composite
+            fh.write(b"\x01")
+        os.environ[ENV_VAR] = path
+        try:
+            ok, out = run(5000, chunk=512)
+        finally:
+            del os.environ[ENV_VAR]
+        if ok or "at 1 indices. Example: [(10, 1, 0)]" not in out or "n=10 (odd=21): T=1, oracle=0" not in out:
+            failures.append(("corrupted store", out))
+        env = dict(os.environ, **{ENV_VAR: path})
+        code = subprocess.run([sys.executable, os.path.join(HERE, "verify_T.py"), "5000"], env=env,
+                              stdout=subprocess.DEVNULL).returncode
+        if code != 1:
+            failures.append(("exit code with corrupted store", code))
+    code = subprocess.run([sys.executable, os.path.join(HERE, "verify_T.py"), "3000", "5"],
+                          stdout=subprocess.DEVNULL).returncode
+    if code != 0:
+        failures.append(("exit code with p_max", code))
+
+    print("Checked early exit, mismatch reports, the p_max policy and exit codes of verify_T.py.")
+    if failures:
+        print(f"Failures: {len(failures)}. First few: {failures[:3]}")
+        sys.exit(1)
+    print("Streaming verifier reports and exits as expected.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# Check the artifact cache: counts sliced from a larger cached grid equal
+# generate_counts on square and rectangular sub-grids, the directory stays
+# under its byte budget while artifacts are added, corrupt files are dropped
+# and recomputed, and artifacts get the umask's mode rather than 0600.
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from true_string_collision import generate_counts
+from artifact_cache import ArtifactCache, cached_counts
+
+
+def dir_bytes(root: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, fn)) for fn in os.listdir(root) if fn.endswith(".npz"))
+
+
+def main():
+    MAX_M = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    MAX_N = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    failures = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ArtifactCache(tmp)
+        cached_counts(cache, MAX_M, MAX_N)  # the only grid built
+        subgrids = [(m, n) for m in range(0, MAX_M + 1, 3) for n in range(0, MAX_N + 1, 4)]
+        subgrids += [(MAX_M, MAX_N), (MAX_M, 0), (0, MAX_N), (MAX_N, MAX_N)]
+        for m, n in subgrids:
+            if cached_counts(cache, m, n) != generate_counts(m, n):
+                failures.append(("ordered", m, n))
+            if cached_counts(cache, m, n, unordered=True) != generate_counts(m, n, unordered=True):
+                failures.append(("unordered", m, n))
+        # a fresh cache object must read the same answers back from disk
+        reread = ArtifactCache(tmp)
+        for m, n in subgrids[::5]:
+            if cached_counts(reread, m, n) != generate_counts(m, n):
+                failures.append(("reread", m, n))
+        grids = list(cache.entries("grid"))
+        if len(grids) != 1:
+            failures.append(("grids built", len(grids)))
+        umask = os.umask(0)
+        os.umask(umask)
+        modes = {oct(os.stat(path).st_mode & 0o777) for _, path in grids + list(cache.entries("counts"))}
+        if modes != {oct(0o666 & ~umask)}:
+            failures.append(("file mode", modes))
+        print(f"Checked {len(subgrids)} sub-grids sliced from the cached {MAX_M}x{MAX_N} grid.")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        budget = 256 * 1024
+        cache = ArtifactCache(tmp, budget)
+        rng = np.random.default_rng(0)
+        for i in range(60):
+            params = {"i": i}
+            cache.put("blob", params, {"data": rng.integers(0, 1 << 62, size=int(rng.integers(100, 8000)))})
+            if not os.path.exists(cache.path("blob", params)):
+                failures.append(("evicted newest", i))
+            if dir_bytes(tmp) > budget:
+                failures.append(("over budget", i, dir_bytes(tmp)))
+        # reading the least recently used artifact protects it from the next eviction
+        oldest = min(cache.entries("blob"), key=lambda e: os.stat(e[1]).st_mtime_ns)
+        before = {path for _, path in cache.entries("blob")}
+        cache.get("blob", oldest[0])
+        cache.put("blob", {"i": 60}, {"data": np.zeros(4000, dtype=np.int64)})
+        after = {path for _, path in cache.entries("blob")}
+        if oldest[1] not in after:
+            failures.append(("LRU evicted a recent read",))
+        if not before - after:
+            failures.append(("nothing evicted",))
+        print(f"Eviction kept the cache at {dir_bytes(tmp)} <= {budget} bytes.")
+
+        # corrupt artifact: dropped on read and recomputed
+        params = {"max_m": 5, "max_n": 7, "unordered": False}
+        path = cache.path("counts", params)
+        with open(path, "wb") as fh:
+            fh.write(b"not a zip file")
+        if cached_counts(ArtifactCache(tmp, budget), 5, 7) != generate_counts(5, 7):
+            failures.append(("corrupt counts",))
+
+    if failures:
+        print(f"Failures: {len(failures)}. First few: {failures[:10]}")
+        sys.exit(1)
+    print("Artifact cache slices, evicts and recovers correctly.")
+
+
+if __name__ == "__main__":
+    main()
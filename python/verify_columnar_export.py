@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# Check columnar_export.py: the counts, residues and T tables read back from
+# npy (memory-mapped, with the patched header), CSV and, when pyarrow is
+# installed, parquet and arrow equal generate_counts / is_prime /
+# mod_distribution / T_via_sieve, over rectangular grids and several worker
+# and band counts.
+import os
+import sys
+import csv
+import json
+import tempfile
+import subprocess
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from spectral_t_utils import T_via_sieve
+from true_string_collision import generate_counts, is_prime, mod_distribution
+from columnar_export import HAVE_ARROW, export_counts, export_T
+
+if HAVE_ARROW:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MODS = [3, 4, 8]
+DTYPES = {"int64": np.dtype("<i8"), "uint8": np.dtype("u1"), "bool": np.dtype("?")}
+
+
+def read_tables(out_dir: str, name: str, columns: Dict[str, str], formats: List[str]) -> Dict[str, Dict]:
+    # format -> {column: list}, for every format that was written
+    tables = {}
+    if "npy" in formats:
+        table = {}
+        for col, kind in columns.items():
+            arr = np.load(os.path.join(out_dir, name, f"{col}.npy"), mmap_mode="r")
+            if arr.dtype != DTYPES[kind] or arr.ndim != 1:
+                raise ValueError(f"{name}/{col}.npy has dtype {arr.dtype}, shape {arr.shape}")
+            table[col] = arr.tolist()
+        tables["npy"] = table
+    if "csv" in formats:
+        with open(os.path.join(out_dir, f"{name}.csv"), newline="") as fh:
+            rows = list(csv.reader(fh))
+        if rows[0] != list(columns):
+            raise ValueError(f"{name}.csv header {rows[0]}")
+        parse = {"int64": int, "uint8": int, "bool": lambda s: {"True": True, "False": False}[s]}
+        tables["csv"] = {col: [parse[kind](row[i]) for row in rows[1:]] for i, (col, kind) in enumerate(columns.items())}
+    if "parquet" in formats:
+        tables["parquet"] = pq.read_table(os.path.join(out_dir, f"{name}.parquet")).to_pydict()
+    if "arrow" in formats:
+        tables["arrow"] = pa.ipc.open_file(pa.memory_map(os.path.join(out_dir, f"{name}.arrow"))).read_all().to_pydict()
+    return tables
+
+
+def main():
+    formats = ["npy", "csv"] + (["parquet", "arrow"] if HAVE_ARROW else [])
+    failures = []
+    runs = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for max_m, max_n in [(0, 0), (13, 5), (5, 40), (60, 23)]:
+            counts = generate_counts(max_m, max_n)
+            values = sorted(counts)
+            expected = {"value": values, "count": [counts[x] for x in values],
+                        "is_prime": [is_prime(x) for x in values]}
+            rows = [(q, r, c) for q in MODS for r, c in enumerate(mod_distribution(counts, q))]
+            expected_residues = {"modulus": [r[0] for r in rows], "residue": [r[1] for r in rows],
+                                 "count": [r[2] for r in rows]}
+            for workers in (1, 2, 3):
+                for bands in (None, 1, 4, 17):
+                    out_dir = os.path.join(tmp, f"counts_{max_m}_{max_n}_{workers}_{bands}")
+                    export_counts(max_m, max_n, out_dir, formats, MODS, workers, bands)
+                    got = read_tables(out_dir, "counts", {"value": "int64", "count": "int64", "is_prime": "bool"},
+                                      formats)
+                    got_residues = read_tables(out_dir, "residues",
+                                               {"modulus": "int64", "residue": "int64", "count": "int64"}, formats)
+                    for fmt in formats:
+                        if got[fmt] != expected:
+                            failures.append(("counts", fmt, max_m, max_n, workers, bands))
+                        if got_residues[fmt] != expected_residues:
+                            failures.append(("residues", fmt, max_m, max_n, workers, bands))
+                    runs += 1
+        print(f"Read back {runs} counts exports in {', '.join(formats)}.")
+
+        for N, chunk in [(0, 8), (10007, 1000), (10007, 1 << 22)]:
+            out_dir = os.path.join(tmp, f"T_{N}_{chunk}")
+            export_T(N, out_dir, formats, chunk)
+            T = T_via_sieve(N)
+            got = read_tables(out_dir, "T", {"n": "int64", "T": "uint8"}, [fmt for fmt in formats if fmt != "npy"])
+            for fmt, table in got.items():
+                if table != {"n": list(range(N + 1)), "T": T}:
+                    failures.append(("T table", fmt, N, chunk))
+            bits = np.load(os.path.join(out_dir, "T_bits.npy"), mmap_mode="r")
+            with open(os.path.join(out_dir, "T_bits.json")) as fh:
+                meta = json.load(fh)
+            if meta != {"nbits": N + 1, "bitorder": "little"} or \
+                    np.unpackbits(bits, bitorder="little")[:N + 1].tolist() != T:
+                failures.append(("T bits", N, chunk))
+        print("Read back the T bitset and tables.")
+
+    for chunk in ("12", "0", "-8"):
+        proc = subprocess.run([sys.executable, os.path.join(HERE, "columnar_export.py"), "T", "--N", "10",
+                               "--chunk", chunk, "--out", os.devnull], capture_output=True, text=True)
+        if proc.returncode != 2 or "--chunk" not in proc.stderr:
+            failures.append(("--chunk accepted", chunk, proc.returncode))
+
+    if failures:
+        print(f"Failures: {len(failures)}. First few: {failures[:10]}")
+        sys.exit(1)
+    print("Columnar exports match generate_counts and T_via_sieve.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# Check instrumentation.py through the instrumented entry points, each run in
+# a fresh interpreter configured by the environment variables:
+#   - disabled (TRUE_STRING_PROFILE unset) writes nothing
+#   - TRUE_STRING_PROFILE=jsonl writes one record per call, with phases, items
+#     and io_bytes, for nested calls (T_via_sieve -> T_sieve_parallel, a
+#     generate_up_to resume finishing an interrupted run) and for the
+#     generate_up_to checkpoints; TRUE_STRING_PROFILE_MEM=1 adds traced peaks
+#   - TRUE_STRING_PROFILE=prom writes Prometheus text that parses and carries
+#     the same totals
+import os
+import re
+import sys
+import json
+import tempfile
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+WORKLOAD = """
+import os, sys
+sys.path.insert(0, {here!r})
+from true_string_collision import generate_counts
+from spectral_t_utils import T_via_sieve
+from verify_symmetric import InterruptedGenerator, Interrupted
+from start import TrueStringGenerator
+
+generate_counts(30, 20)
+T_via_sieve(5000)
+T_via_sieve(5000, workers=2)
+plain = os.path.join({tmp!r}, "plain.pkl")
+TrueStringGenerator(plain).generate_up_to(5, 5)
+print(os.path.getsize(plain))
+resumed = os.path.join({tmp!r}, "resumed.pkl")
+try:
+    InterruptedGenerator(resumed, 2).generate_up_to(8, 8, symmetric=True)
+except Interrupted:
+    pass
+TrueStringGenerator(resumed).generate_up_to(4, 4, symmetric=True)
+"""
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)'
+                    r'(?:\{((?:[a-zA-Z_][a-zA-Z0-9_]*="[^"\\]*")(?:,[a-zA-Z_][a-zA-Z0-9_]*="[^"\\]*")*)\})?'
+                    r' (\S+)$')
+
+
+def run_workload(tmp: str, out_path: str, **env_vars) -> subprocess.CompletedProcess:
+    env = {k: v for k, v in os.environ.items() if not k.startswith("TRUE_STRING_PROFILE")}
+    env.update(env_vars, TRUE_STRING_PROFILE_OUT=out_path)
+    for fn in os.listdir(tmp):
+        if fn.endswith(".pkl"):
+            os.remove(os.path.join(tmp, fn))
+    return subprocess.run([sys.executable, "-c", WORKLOAD.format(here=HERE, tmp=tmp)], env=env,
+                          capture_output=True, text=True, check=True)
+
+
+def parse_prometheus(text: str) -> dict:
+    # {(metric, labels): value}; raises ValueError on any malformed line
+    types, samples = {}, {}
+    for line in text.splitlines():
+        if line.startswith("# HELP "):
+            continue
+        if line.startswith("# TYPE "):
+            _, _, metric, kind = line.split(" ")
+            if kind not in ("counter", "gauge"):
+                raise ValueError(line)
+            types[metric] = kind
+            continue
+        match = SAMPLE.match(line)
+        if not match or match.group(1) not in types:
+            raise ValueError(line)
+        labels = tuple(sorted(re.findall(r'([a-zA-Z_][a-zA-Z0-9_]*)="([^"]*)"', match.group(2) or "")))
+        samples[(match.group(1), labels)] = float(match.group(3))
+    return samples
+
+
+def check_records(records: list, plain_size: int, traced: bool) -> list:
+    failures = []
+    fns = [r["fn"] for r in records]
+    expected_fns = ["generate_counts", "T_via_sieve", "T_sieve_parallel", "T_via_sieve",
+                    "generate_up_to", "generate_up_to", "generate_up_to", "generate_up_to"]
+    if fns != expected_fns:
+        return [("records", fns)]
+    for r in records:
+        if not isinstance(r["peak_rss_bytes"], int) or r["peak_rss_bytes"] <= 0:
+            failures.append(("peak_rss_bytes", r))
+        if ("peak_traced_bytes" in r) != traced or (traced and r["peak_traced_bytes"] <= 0):
+            failures.append(("peak_traced_bytes", r))
+    counts, sieve, inner, outer, plain, interrupted, finished, resumed = records
+    if counts["items"] != 31 * 21 or set(counts["phases_s"]) != {"enumerate"}:
+        failures.append(("generate_counts", counts))
+    if sieve["items"] != 5001 or set(sieve["phases_s"]) != {"sieve", "build"}:
+        failures.append(("T_via_sieve", sieve))
+    # the nested call is emitted first and keeps its own items and phases
+    if inner["items"] != 5001 or set(inner["phases_s"]) != {"base_primes", "sieve"}:
+        failures.append(("nested T_sieve_parallel", inner))
+    if outer["items"] != 0 or outer["phases_s"] or outer["wall_s"] < inner["wall_s"]:
+        failures.append(("outer T_via_sieve", outer))
+    # six checkpoints of growing size, the last one plain_size bytes
+    if plain["items"] != 36 or set(plain["phases_s"]) != {"enumerate", "checkpoint"} or \
+            not plain_size < plain["io_bytes"] < 6 * plain_size:
+        failures.append(("generate_up_to checkpoints", plain, plain_size))
+    # interrupted after row 2 of a symmetric 8x8 run, then finished by a
+    # nested call from the resume with other bounds: 45 cells with m <= n
+    if interrupted["items"] + finished["items"] != 45 or interrupted["io_bytes"] <= 0 or \
+            finished["io_bytes"] <= 0 or "checkpoint" not in finished["phases_s"]:
+        failures.append(("interrupted/finished generate_up_to", interrupted, finished))
+    if resumed["items"] != 0 or resumed["io_bytes"] != 0 or resumed["wall_s"] < finished["wall_s"]:
+        failures.append(("resuming generate_up_to", resumed))
+    return failures
+
+
+def main():
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        out_path = os.path.join(tmp, "metrics")
+
+        proc = run_workload(tmp, out_path)
+        if os.path.exists(out_path) or proc.stderr:
+            failures.append(("disabled mode wrote output", proc.stderr[:200]))
+
+        for mem in ("0", "1"):
+            proc = run_workload(tmp, out_path, TRUE_STRING_PROFILE="jsonl", TRUE_STRING_PROFILE_MEM=mem)
+            with open(out_path) as fh:
+                records = [json.loads(line) for line in fh]
+            os.remove(out_path)
+            failures += check_records(records, int(proc.stdout), traced=mem == "1")
+        print(f"JSONL: {len(records)} records per run, with and without traced memory.")
+
+        run_workload(tmp, out_path, TRUE_STRING_PROFILE="prom")
+        with open(out_path) as fh:
+            text = fh.read()
+        try:
+            samples = parse_prometheus(text)
+        except ValueError as e:
+            samples = {}
+            failures.append(("prometheus line", str(e)))
+        fn = lambda name: (("fn", name),)
+        expected = {
+            ("true_string_calls_total", fn("generate_up_to")): 4,
+            ("true_string_calls_total", fn("T_via_sieve")): 2,
+            ("true_string_items_total", fn("generate_counts")): 31 * 21,
+            ("true_string_items_total", fn("T_sieve_parallel")): 5001,
+            ("true_string_items_total", fn("generate_up_to")): 36 + 45,
+        }
+        for key, value in expected.items():
+            if samples.get(key) != value:
+                failures.append(("prometheus sample", key, samples.get(key)))
+        if not samples.get(("true_string_io_bytes_total", fn("generate_up_to")), 0) > 0 or \
+                (("fn", "generate_up_to"), ("phase", "checkpoint")) not in \
+                {labels for metric, labels in samples if metric == "true_string_phase_seconds_total"} or \
+                any(metric == "true_string_peak_traced_bytes" for metric, _ in samples):
+            failures.append(("prometheus totals", text[:400]))
+        print(f"Prometheus: {len(samples)} samples parsed.")
+
+    if failures:
+        print(f"Failures: {len(failures)}. First few: {failures[:10]}")
+        sys.exit(1)
+    print("Instrumentation records calls, phases, items and checkpoint I/O as specified.")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ import math
 from collections import defaultdict
 from typing import Dict, List, Tuple
 
-from true_string_collision import f
+from true_string_collision import preimage_count
 
 
 def primes_upto(limit: int) -> List[int]:
@@ -40,14 +40,11 @@ def odd_divisor_count(c: int) -> int:
 
 
 def enumerate_preimages(c: int, mmax: int, nmax: int) -> int:
-    # naive enumeration of (m,n) to count preimages for small bounds
-    cnt = 0
-    target = (c - 1) // 2
-    for m in range(0, mmax + 1):
-        for n in range(0, nmax + 1):
-            if 2 * f(m, n) + 1 == c:
-                cnt += 1
-    return cnt
+    # enumeration of (m,n) to count preimages for small bounds; only m<=n
+    # is visited, mirrored cells counting twice
+    if c % 2 == 0:
+        return 0
+    return preimage_count((c - 1) // 2, mmax, nmax)
 
 
 def main():
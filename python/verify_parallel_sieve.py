@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# Check that T_sieve_parallel is byte-identical to T_via_sieve for small N
+# (including 0, 1, 2), with tiny and odd segment sizes and several worker
+# counts, and that T_via_sieve(N, workers) returns the same list.
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from spectral_t_utils import T_via_sieve, T_sieve_parallel
+
+
+def main():
+    N_MAX = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    cases = [(N, seg, 2) for N in range(0, 24) for seg in (1, 3, 7)]
+    cases += [(N, seg, w) for N in (97, 1000, 4097, 12345) for seg in (1, 5, 64, 1000, 1 << 24) for w in (2, 3)]
+    cases += [(N_MAX, seg, w) for seg in (4099, 65536, 1 << 24) for w in (1, 2, 4)]
+    failures = []
+    for N, seg, workers in cases:
+        expected = bytes(T_via_sieve(N))
+        with T_sieve_parallel(N, workers, seg) as shared:
+            if len(shared.buf) != N + 1 or shared.buf != expected:
+                failures.append((N, seg, workers))
+    for N in (0, 1, 2, 1000):
+        if T_via_sieve(N, workers=2) != T_via_sieve(N):
+            failures.append(("T_via_sieve workers=2", N))
+    print(f"Compared T_sieve_parallel with T_via_sieve in {len(cases)} (N, segment, workers) cases.")
+    if failures:
+        print(f"Failures: {len(failures)}. First few: {failures[:10]}")
+        sys.exit(1)
+    print("Parallel sieve is byte-identical to T_via_sieve.")
+
+
+if __name__ == "__main__":
+    main()
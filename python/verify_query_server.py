@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# Check query_server.py end to end: start it on a temporary Unix socket and
+# compare T, count_T, multiplicity and preimages with T_via_sieve and
+# preimage_count, through single, batched, array-of-requests and HTTP GET
+# queries, including growth past the initial N and c beyond the tables, and
+# error replies to malformed arguments and requests.
+import os
+import sys
+import json
+import time
+import socket
+import tempfile
+import subprocess
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from spectral_t_utils import T_via_sieve
+from true_string_collision import preimage_count
+from query_server import query
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def raw(address: str, payload: bytes) -> bytes:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(30)
+        sock.connect(address)
+        sock.sendall(payload)
+        sock.shutdown(socket.SHUT_WR)
+        chunks = []
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                return b"".join(chunks)
+            chunks.append(data)
+
+
+def brute_preimages(c: int) -> List[List[int]]:
+    if c % 2 == 0:
+        return []
+    small = [u for u in range(3, int(c ** 0.5) + 1, 2) if c % u == 0]
+    divs = sorted(set(small + [c // u for u in small]))
+    return [[(u - 3) // 2, (c // u - 3) // 2] for u in divs]
+
+
+def main():
+    N0 = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    N = int(sys.argv[2]) if len(sys.argv) > 2 else 300000
+    max_N = 1 << 20
+    failures = []
+    T = T_via_sieve(N)
+    prefix = [0]
+    for t in T:
+        prefix.append(prefix[-1] + t)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        address = os.path.join(tmp, "qs.sock")
+        proc = subprocess.Popen([sys.executable, os.path.join(HERE, "query_server.py"), "--N", str(N0),
+                                 "--max-N", str(max_N), "--unix", address],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        try:
+            deadline = time.time() + 60
+            while not os.path.exists(address):
+                if proc.poll() is not None or time.time() > deadline:
+                    print(proc.stderr.read().decode() if proc.poll() is not None else "server did not start")
+                    sys.exit(1)
+                time.sleep(0.05)
+
+            # single queries inside the initial tables
+            for n in (0, 1, 2, 5, N0 // 2, N0):
+                if query(address, "T", n) != T[n] or query(address, "count_T", n) != prefix[n + 1]:
+                    failures.append(("single", n))
+            # batches, growing the tables past N0 up to N
+            ns = list(range(0, N + 1, 997)) + [N0 + 1, N - 1, N]
+            if query(address, "T", ns) != [T[n] for n in ns]:
+                failures.append(("batch T",))
+            if query(address, "count_T", ns) != [prefix[n + 1] for n in ns]:
+                failures.append(("batch count_T",))
+            # multiplicity / preimages, in-table and beyond the tables
+            cs = list(range(1, 3001, 2)) + [2 * N + 1, 2 * N + 3, 4 * N + 1, 225 * 2 * N + 225, 4000]
+            mult = query(address, "multiplicity", cs)
+            pre = query(address, "preimages", cs)
+            for c, got_mult, got_pre in zip(cs, mult, pre):
+                expected = brute_preimages(c)
+                if got_pre != expected or got_mult != len(expected):
+                    failures.append(("multiplicity/preimages", c, got_mult, len(expected)))
+                if c < 3000 and c % 2 and got_mult != preimage_count((c - 1) // 2, c // 2, c // 2):
+                    failures.append(("preimage_count", c))
+            semiprime = 1000003 * 1000033  # factored off the event loop
+            if query(address, "multiplicity", semiprime) != 2 or \
+                    query(address, "preimages", semiprime) != [[500000, 500015], [500015, 500000]]:
+                failures.append(("semiprime",))
+            try:
+                query(address, "multiplicity", (2 * max_N + 3) ** 2)
+                failures.append(("c beyond (2*max_N+1)**2 accepted",))
+            except ValueError:
+                pass
+            try:
+                query(address, "T", max_N + 1)
+                failures.append(("index beyond max_N accepted",))
+            except ValueError:
+                pass
+
+            # a JSON array of requests on one line, and several lines per connection
+            lines = raw(address, b'[{"op": "T", "n": 7}, {"op": "count_T", "N": [10, 20]}, {"op": "nope"}]\n'
+                                 b'{"op": "preimages", "c": 45}\n').splitlines()
+            if json.loads(lines[0]) != [{"ok": True, "result": T[7]},
+                                        {"ok": True, "result": [prefix[11], prefix[21]]},
+                                        {"ok": False, "error": "unknown op 'nope'"}] or \
+                    json.loads(lines[1]) != {"ok": True, "result": brute_preimages(45)}:
+                failures.append(("array request", lines))
+
+            # malformed arguments and requests get an error object, and the
+            # connection keeps answering
+            bad = [b'{"op": "multiplicity", "c": Infinity}', b'{"op": "T", "n": 1e400}', b'[1, 2]',
+                   b'{"op": "T", "n": 5.7}', b'{"op": "T", "n": true}', b'{"op": "count_T", "N": [3, 2.5]}',
+                   b'{"op": "T", "n": "5x"}', b'{"op": "T", "n": null}', b'"T"', b'[' * 20000,
+                   b'{"op": "T", "n": 7}']
+            lines = raw(address, b"\n".join(bad) + b"\n").splitlines()
+            replies = [json.loads(line) for line in lines]
+            if len(replies) != len(bad) or replies[-1] != {"ok": True, "result": T[7]} or \
+                    replies[2] != [{"ok": False, "error": "request must be an object"}] * 2 or \
+                    any(r.get("ok", True) for i, r in enumerate(replies[:-1]) if i != 2):
+                failures.append(("malformed requests", lines[:12]))
+            if raw(address, b'{"op": "T", "n": "' + b"1" * 200000 + b'"}\n') != \
+                    b'{"ok":false,"error":"request line too long"}\n':
+                failures.append(("over-long line",))
+            if query(address, "T", "5") != T[5] or query(address, "count_T", ["-1", 10]) != [0, prefix[11]]:
+                failures.append(("digit-string arguments",))
+
+            # HTTP GET on the same socket
+            resp = raw(address, f"GET /T?n=5,{N} HTTP/1.1\r\nHost: x\r\n\r\n".encode())
+            head, _, body = resp.partition(b"\r\n\r\n")
+            if not head.startswith(b"HTTP/1.1 200") or json.loads(body) != {"ok": True, "result": [T[5], T[N]]}:
+                failures.append(("http", resp[:200]))
+            for path in (b"/multiplicity?c=abc", b"/T?n=5.7", b"/T?n=1e400", b"/T"):
+                resp = raw(address, b"GET " + path + b" HTTP/1.1\r\n\r\n")
+                if not resp.startswith(b"HTTP/1.1 400"):
+                    failures.append(("http error", path, resp[:200]))
+        finally:
+            proc.terminate()
+            proc.wait(10)
+        errors = proc.stderr.read().decode()
+        if "Traceback" in errors or "Unhandled exception" in errors:
+            failures.append(("server errors", errors[:400]))
+
+    print(f"Queried T/count_T up to N={N} (tables grown from {N0}) and {len(cs) + 1} values of c.")
+    if failures:
+        print(f"Failures: {len(failures)}. First few: {failures[:10]}")
+        sys.exit(1)
+    print("Query server answers match T_via_sieve and preimage_count.")
+
+
+if __name__ == "__main__":
+    main()
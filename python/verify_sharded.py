@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# Check the sharded profiler: sharded_profile over several band and worker
+# counts reproduces the single-process statistics (summary, residues,
+# divisibility, first entries) on square and rectangular grids, and the
+# value bands hold about the same number of cells each.
+import sys
+from typing import List
+
+from true_string_collision import (generate_counts, summarize, mod_distribution, small_prime_divisibility,
+                                   sharded_profile, value_bands, count_band)
+
+MODS = [3, 4, 8, 5]
+DIVISORS = [2, 3, 5, 7, 11]
+HEAD = 12
+
+
+def single_process(max_m: int, max_n: int):
+    counts = generate_counts(max_m, max_n)
+    return {
+        "summary": summarize(counts),
+        "mods": {q: mod_distribution(counts, q) for q in MODS},
+        "divisibility": small_prime_divisibility(counts, DIVISORS),
+        "head": sorted(counts.items())[:HEAD],
+    }
+
+
+def main():
+    failures: List[tuple] = []
+    grids = [(0, 0), (1, 5), (7, 3), (20, 20), (37, 11), (11, 37), (60, 45)]
+    runs = 0
+    for max_m, max_n in grids:
+        expected = single_process(max_m, max_n)
+        for workers in (1, 2, 3):
+            for bands in (1, 2, 3, 7, 50, None):
+                for symmetric in (True, False):
+                    got = sharded_profile(max_m, max_n, MODS, DIVISORS, workers, head=HEAD,
+                                          bands=bands, symmetric=symmetric)
+                    got["head"] = [tuple(e) for e in got["head"]]
+                    if got != expected:
+                        failures.append((max_m, max_n, workers, bands, symmetric))
+                    runs += 1
+    print(f"Compared {runs} sharded runs against the single-process profile.")
+
+    # band balance: cells per band stay close to an equal share
+    max_m, max_n, bands = 600, 250, 30
+    band_list = value_bands(max_m, max_n, bands)
+    sizes = [sum(count_band((max_m, max_n, lo, hi, False)).values()) for lo, hi in band_list]
+    share = (max_m + 1) * (max_n + 1) / len(band_list)
+    worst = max(sizes) / share
+    print(f"{len(band_list)} bands over {max_m}x{max_n}: cells per band {min(sizes)}..{max(sizes)} (share {share:.0f})")
+    if sum(sizes) != (max_m + 1) * (max_n + 1) or len(band_list) != bands or worst > 1.1:
+        failures.append(("band balance", worst))
+
+    if failures:
+        print(f"Failures: {len(failures)}. First few: {failures[:10]}")
+        sys.exit(1)
+    print("Sharded profile matches the single-process output.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# Regression check for the symmetric (m <= n) enumeration: generate_counts
+# (symmetric / unordered), preimage_count and TrueStringGenerator.generate_up_to
+# (one-shot, incremental, resumed after an interruption, and resumed with other
+# bounds or mode, which finishes the interrupted symmetric run) against a plain
+# walk over the full grid, for every grid up to MAX x MAX.
+import os
+import sys
+import tempfile
+from typing import Dict
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from true_string_collision import f, generate_counts, preimage_count
+from start import TrueStringGenerator
+
+
+class Interrupted(Exception):
+    pass
+
+
+class InterruptedGenerator(TrueStringGenerator):
+    # stops right after the checkpoint of row stop_after, like a killed run
+    def __init__(self, state_file: str, stop_after: int):
+        self.stop_after = stop_after
+        super().__init__(state_file)
+
+    def save_state(self):
+        super().save_state()
+        if self.max_m == self.stop_after:
+            raise Interrupted
+
+
+def full_counts(max_m: int, max_n: int, unordered: bool = False) -> Dict[int, int]:
+    counts: Dict[int, int] = {}
+    seen = set()
+    for m in range(max_m + 1):
+        for n in range(max_n + 1):
+            if unordered:
+                pair = (min(m, n), max(m, n))
+                if pair in seen:
+                    continue
+                seen.add(pair)
+            x = f(m, n)
+            counts[x] = counts.get(x, 0) + 1
+    return counts
+
+
+def full_T(max_m: int, max_n: int) -> Dict[int, int]:
+    # generator semantics: a value keeps itself iff exactly one cell hits it
+    return {x: x if c == 1 else 0 for x, c in full_counts(max_m, max_n).items()}
+
+
+def run_generator(state_file: str, steps, symmetric: bool) -> Dict[int, int]:
+    # steps: (target_m, target_n, stop_after or None), each with a fresh
+    # generator loading the previous checkpoint
+    for target_m, target_n, stop_after in steps:
+        if stop_after is None:
+            TrueStringGenerator(state_file).generate_up_to(target_m, target_n, symmetric=symmetric)
+        else:
+            try:
+                InterruptedGenerator(state_file, stop_after).generate_up_to(target_m, target_n, symmetric=symmetric)
+            except Interrupted:
+                pass
+    return TrueStringGenerator(state_file).T
+
+
+def main():
+    MAX = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    failures = []
+    checked = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        state_file = os.path.join(tmp, "state.pkl")
+        for max_m in range(MAX + 1):
+            for max_n in range(MAX + 1):
+                ordered = full_counts(max_m, max_n)
+                unordered = full_counts(max_m, max_n, unordered=True)
+                if generate_counts(max_m, max_n, symmetric=True) != ordered:
+                    failures.append(("symmetric counts", max_m, max_n))
+                if generate_counts(max_m, max_n, unordered=True) != unordered:
+                    failures.append(("unordered counts", max_m, max_n))
+                for x in range(f(0, 0) - 1, f(max_m, max_n) + 2):
+                    if preimage_count(x, max_m, max_n) != ordered.get(x, 0):
+                        failures.append(("preimage_count", max_m, max_n, x))
+                    if preimage_count(x, max_m, max_n, unordered=True) != unordered.get(x, 0):
+                        failures.append(("unordered preimage_count", max_m, max_n, x))
+
+                expected = full_T(max_m, max_n)
+                runs = {"one-shot": [(max_m, max_n, None)]}
+                for k in range(max_m):
+                    runs[f"incremental after row {k}"] = [(k, max_n, None), (max_m, max_n, None)]
+                    runs[f"resumed after row {k}"] = [(max_m, max_n, k), (max_m, max_n, None)]
+                for symmetric in (False, True):
+                    for name, steps in runs.items():
+                        if os.path.exists(state_file):
+                            os.remove(state_file)
+                        if run_generator(state_file, steps, symmetric) != expected:
+                            failures.append((f"generate_up_to {name}", symmetric, max_m, max_n))
+                # an interrupted symmetric run resumed with other bounds or
+                # without symmetry completes its own target first
+                for k in range(max_m):
+                    for resume_m, resume_n, resume_symmetric in [(k, max_n, True), (k + 1, max_n // 2, True),
+                                                                 (k + 1, max_n // 2, False),
+                                                                 (max_m, max_n, False)]:
+                        if os.path.exists(state_file):
+                            os.remove(state_file)
+                        try:
+                            InterruptedGenerator(state_file, k).generate_up_to(max_m, max_n, symmetric=True)
+                        except Interrupted:
+                            pass
+                        TrueStringGenerator(state_file).generate_up_to(resume_m, resume_n, symmetric=resume_symmetric)
+                        if TrueStringGenerator(state_file).T != expected:
+                            failures.append(("mismatched resume", k, resume_m, resume_n, resume_symmetric,
+                                             max_m, max_n))
+                checked += 1
+
+    print(f"Checked {checked} grids up to {MAX}x{MAX} (counts, preimage_count, generate_up_to).")
+    if failures:
+        print(f"Failures: {len(failures)}. First few: {failures[:10]}")
+        sys.exit(1)
+    print("Symmetric and unordered modes match the full-grid enumeration.")
+
+
+if __name__ == "__main__":
+    main()
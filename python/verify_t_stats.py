@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# Check t_stats against a naive pass over T_via_sieve: residue counts, block
+# densities and gap histograms across chunk sizes, and stats_from_bitset on
+# the T_bits.npy bitset written by columnar_export.py.
+import os
+import sys
+import tempfile
+from typing import Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from spectral_t_utils import T_via_sieve
+from t_store import ENV_VAR
+from t_stats import TStats, T_statistics, packed_chunks, stats_from_bitset
+from columnar_export import export_T
+
+MODULI = [3, 4, 5, 6, 8, 10, 30]
+BLOCK = 64
+
+
+def naive(T: List[int]) -> Dict:
+    primes = [n for n, t in enumerate(T) if t]
+    gaps: Dict[int, int] = {}
+    for a, b in zip(primes, primes[1:]):
+        gaps[b - a] = gaps.get(b - a, 0) + 1
+    residues = {q: [0] * q for q in MODULI}
+    for n in primes:
+        for q in MODULI:
+            residues[q][(2 * n + 1) % q] += 1
+    blocks = [sum(T[b:b + BLOCK]) for b in range(0, len(T), BLOCK)]
+    return {"total": len(primes), "length": len(T), "residues": residues, "blocks": blocks, "gaps": gaps}
+
+
+def naive_densities(T: List[int], window: int, step: int) -> List[tuple]:
+    k, s = window // BLOCK, step // BLOCK
+    nblocks = -(-len(T) // BLOCK)
+    return [(i * BLOCK, sum(T[i * BLOCK:i * BLOCK + window]) / min(window, len(T) - i * BLOCK))
+            for i in range(0, nblocks - k + 1, s)]
+
+
+def compare(stats: TStats, T: List[int], expected: Dict, label: tuple, failures: List) -> None:
+    got = {"total": stats.total, "length": stats.length, "residues": stats.residue_counts,
+           "blocks": stats.block_counts, "gaps": stats.gap_hist}
+    for key in expected:
+        if got[key] != expected[key]:
+            failures.append(label + (key,))
+    for window, step in ((BLOCK, BLOCK), (4 * BLOCK, BLOCK), (8 * BLOCK, 2 * BLOCK)):
+        if stats.densities(window, step) != naive_densities(T, window, step):
+            failures.append(label + ("densities", window, step))
+
+
+def main():
+    N_MAX = int(sys.argv[1]) if len(sys.argv) > 1 else 200003
+    os.environ.pop(ENV_VAR, None)
+    failures: List[tuple] = []
+    runs = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for N in (0, 1, 2, 7, 8, 9, 100, 4095, 12345, N_MAX):
+            T = T_via_sieve(N)
+            expected = naive(T)
+            for chunk in (8, 16, 1000, 4096, 1 << 22):
+                compare(T_statistics(N, MODULI, BLOCK, chunk=chunk), T, expected, ("T_statistics", N, chunk), failures)
+                runs += 1
+            out = os.path.join(tmp, str(N))
+            export_T(N, out, ["npy"], chunk=1 << 12)
+            path = os.path.join(out, "T_bits.npy")
+            compare(stats_from_bitset(path, MODULI, BLOCK), T, expected, ("stats_from_bitset", N), failures)
+            for chunk_bytes in (1, 3, 64):
+                stats = TStats(MODULI, BLOCK)
+                for lo, packed, n in packed_chunks(path, chunk_bytes=chunk_bytes):
+                    stats.update_packed(lo, packed, n)
+                compare(stats, T, expected, ("packed_chunks", N, chunk_bytes), failures)
+            runs += 4
+    print(f"Compared {runs} popcount passes with a naive pass over T_via_sieve (N up to {N_MAX}).")
+    if failures:
+        print(f"Failures: {len(failures)}. First few: {failures[:10]}")
+        sys.exit(1)
+    print("Residues, block densities and gap histograms agree.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# Check the T store's concurrency contract:
+#   - readers clamp to the published length while another process extends
+#     the store, and always see a prefix of the true T
+#   - a writer dying between append and publish leaves the store at its old
+#     length; the unpublished tail is ignored by readers and discarded by the
+#     next extend
+#   - processes creating and extending the same new store concurrently agree,
+#     and the store gets the umask's mode rather than mkstemp's 0600
+import os
+import sys
+import math
+import tempfile
+import multiprocessing as mp
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from spectral_t_utils import primes_upto, sieve_T_segment
+from t_store import TStore, HEADER_SIZE
+
+
+def true_T(N: int) -> bytes:
+    return bytes(sieve_T_segment(0, N + 1, primes_upto(math.isqrt(2 * N + 1))))
+
+
+def extend_store(path: str, N: int, segment_size: int) -> None:
+    TStore(path).extend(N, segment_size)
+
+
+def extend_and_crash(path: str, N: int) -> None:
+    # die right after the appended segment is fsynced, before the length is published
+    real_fsync = os.fsync
+
+    def fsync_then_die(fd):
+        real_fsync(fd)
+        os._exit(3)
+
+    os.fsync = fsync_then_die
+    TStore(path).extend(N, 1 << 12)
+
+
+def main():
+    N_BIG = int(sys.argv[1]) if len(sys.argv) > 1 else 3000000
+    N_SMALL = 1000
+    failures = []
+    expected = true_T(N_BIG)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # readers during an extension in another process
+        path = os.path.join(tmp, "T.store")
+        TStore(path).extend(N_SMALL)
+        writer = mp.Process(target=extend_store, args=(path, N_BIG, 1 << 12))
+        writer.start()
+        store = TStore(path)
+        reads = reads_past_tail = 0
+        while writer.is_alive() or reads == 0:
+            on_disk = os.path.getsize(path) - HEADER_SIZE
+            data = store.read(0, N_BIG + 10)
+            if len(data) not in (N_SMALL + 1, N_BIG + 1) or data != expected[:len(data)]:
+                failures.append(("read during extend", len(data)))
+            for lo, chunk in store.iter_chunks(N_SMALL - 100, None, 1 << 20):
+                if chunk != expected[lo:lo + len(chunk)]:
+                    failures.append(("iter_chunks during extend", lo))
+            reads += 1
+            reads_past_tail += on_disk > len(data)
+        writer.join()
+        if writer.exitcode != 0 or store.N != N_BIG or store.read() != expected:
+            failures.append(("after extend", writer.exitcode, store.N))
+        print(f"{reads} reads during the extension {N_SMALL} -> {N_BIG}, "
+              f"{reads_past_tail} with unpublished bytes on disk, all clamped to the published length.")
+
+        # crash between append and publish
+        path = os.path.join(tmp, "crash.store")
+        TStore(path).extend(N_SMALL)
+        crasher = mp.Process(target=extend_and_crash, args=(path, 50000))
+        crasher.start()
+        crasher.join()
+        store = TStore(path)
+        tail = os.path.getsize(path) - HEADER_SIZE - (N_SMALL + 1)
+        if crasher.exitcode != 3 or tail <= 0:
+            failures.append(("crash not simulated", crasher.exitcode, tail))
+        if store.N != N_SMALL or store.read(0, 50001) != expected[:N_SMALL + 1]:
+            failures.append(("unpublished tail visible", store.N))
+        if sum(len(c) for _, c in store.iter_chunks(0, 50001, 333)) != N_SMALL + 1:
+            failures.append(("iter_chunks past published length",))
+        # garbage in the unpublished tail must not survive the next extend
+        with open(path, "r+b") as fh:
+            fh.seek(HEADER_SIZE + N_SMALL + 1)
+            fh.write(b"\x07" * 5000)
+        store.extend(20000)
+        if store.N != 20000 or store.read() != expected[:20001] or \
+                os.path.getsize(path) != HEADER_SIZE + 20001:
+            failures.append(("tail not discarded", store.N))
+        print(f"Crash left an unpublished tail of {tail} bytes; readers ignored it and extend discarded it.")
+
+        # concurrent creation and extension of one new store
+        path = os.path.join(tmp, "shared.store")
+        targets = [5000, 120000, 777, 120000, 60000, 1]
+        procs = [mp.Process(target=extend_store, args=(path, n, 1 << 14)) for n in targets]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        store = TStore(path)
+        if any(p.exitcode != 0 for p in procs) or store.N != max(targets) or \
+                store.read() != expected[:max(targets) + 1]:
+            failures.append(("concurrent create", [p.exitcode for p in procs], store.N))
+        leftovers = [fn for fn in os.listdir(tmp) if fn.endswith(".tmp")]
+        if leftovers:
+            failures.append(("temporary files left", leftovers))
+        umask = os.umask(0)
+        os.umask(umask)
+        if os.stat(path).st_mode & 0o777 != 0o666 & ~umask:
+            failures.append(("file mode", oct(os.stat(path).st_mode & 0o777)))
+        print(f"{len(procs)} processes created and extended one store concurrently.")
+
+    if failures:
+        print(f"Failures: {len(failures)}. First few: {failures[:10]}")
+        sys.exit(1)
+    print("T store readers, crash recovery and concurrent writers behave as specified.")
+
+
+if __name__ == "__main__":
+    main()
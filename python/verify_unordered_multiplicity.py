@@ -3,7 +3,7 @@ import sys
 import math
 from typing import List, Tuple
 
-from true_string_collision import f
+from true_string_collision import preimage_count
 
 
 def odd_divisor_count(c: int) -> int:
@@ -26,13 +26,9 @@ def odd_divisor_count(c: int) -> int:
 
 def unordered_count_for_c(c: int, bound: int) -> int:
     # count unordered {m,n} with 2*f(m,n)+1 == c, m<=n<=bound
-    target = (c - 1) // 2
-    cnt = 0
-    for m in range(0, bound + 1):
-        for n in range(m, bound + 1):
-            if 2 * f(m, n) + 1 == c:
-                cnt += 1
-    return cnt
+    if c % 2 == 0:
+        return 0
+    return preimage_count((c - 1) // 2, bound, bound, unordered=True)
 
 
 def main():
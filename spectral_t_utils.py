@@ -5,9 +5,15 @@
 #  - T_from_formula(n): direct floor-formula test (scans primes)
 #  - progression_marking_T(N, p_max=None): marks composites by progressions (up to p_max)
 #  - T_via_sieve(N): fast exact T array using sieve (recommended)
+#  - T_sieve_parallel(N, workers): same T as a zero-copy view of one
+#    shared-memory buffer that a process pool sieves segments into
 
 import math
-from typing import List, Tuple
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+from instrumentation import instrumented, phase, add_items
 
 # -----------------------
 # Utility: generate primes up to limit (simple sieve)
@@ -107,46 +113,190 @@ def progression_marking_T(N: int, p_max: int = None) -> List[int]:
             n += p
     return T
 
+def progression_marking_segment(lo: int, hi: int, primes: List[int]) -> bytearray:
+    """
+    progression_marking_T restricted to indices [lo, hi) as a bytearray:
+    n_p(m) = (3p-1)//2 + p*m is crossed off for every odd p in primes.
+    An index marked by a prime p > sqrt(2N+1) is p*k with odd k < sqrt(2N+1),
+    so it is also marked by the smallest prime factor of k (< p); passing
+    primes <= min(p_max, sqrt(2N+1)) therefore reproduces
+    progression_marking_T(N, p_max) exactly.
+    """
+    seg = bytearray(b'\x01') * (hi - lo)
+    if lo == 0 and hi > 0:
+        seg[0] = 0
+    for p in primes:
+        if p < 3:
+            continue
+        base = (3*p - 1) // 2
+        if base >= hi:
+            break
+        if base < lo:
+            base += ((lo - base + p - 1)//p) * p
+        first = base - lo
+        seg[first::p] = bytes(len(range(first, hi - lo, p)))
+    return seg
+
 # -----------------------
 # Fast exact T via odd-only sieve (recommended)
 # -----------------------
-def T_via_sieve(N: int) -> List[int]:
+@instrumented("T_via_sieve")
+def T_via_sieve(N: int, workers: Optional[int] = None) -> List[int]:
     """
     Compute exact T[0..N] where T[n] = 1 iff o_n = 2n+1 is prime.
     We do an odd-only sieve up to 2N+1.
     Complexity: ~O(N log log N) work and O(N) memory.
+    workers > 1 sieves on a process pool via T_sieve_parallel, then still
+    builds the list (8 bytes per index), so it only suits N whose T fits in
+    a Python list; use T_sieve_parallel directly beyond that.
     """
+    if workers is not None and workers > 1:
+        with T_sieve_parallel(N, workers) as shared:
+            return list(shared.buf)
     limit = 2*N + 1
     if limit < 2:
         return [0]*(N+1)
     # boolean array for odd numbers: index i corresponds to 2*i+1
     size = (limit + 1) // 2
-    is_prime_odd = [True] * size
-    is_prime_odd[0] = False  # 1 not prime
-    max_i = int(math.isqrt(limit))//2
-    for i in range(1, max_i + 1):
-        if is_prime_odd[i]:
-            p = 2*i + 1
-            start = (p*p - 1)//2
-            for j in range(start, size, p):
-                is_prime_odd[j] = False
+    add_items(size)
+    with phase("sieve"):
+        is_prime_odd = [True] * size
+        is_prime_odd[0] = False  # 1 not prime
+        max_i = int(math.isqrt(limit))//2
+        for i in range(1, max_i + 1):
+            if is_prime_odd[i]:
+                p = 2*i + 1
+                start = (p*p - 1)//2
+                for j in range(start, size, p):
+                    is_prime_odd[j] = False
     # Build T list aligning index n to 2n+1 (n range 0..N)
-    T = [0]*(N+1)
-    for n in range(0, N+1):
-        idx = n  # since 2n+1 index in odd array is index n
-        if idx < size and is_prime_odd[idx]:
-            T[n] = 1
-        else:
-            T[n] = 0
+    with phase("build"):
+        T = [0]*(N+1)
+        for n in range(0, N+1):
+            idx = n  # since 2n+1 index in odd array is index n
+            if idx < size and is_prime_odd[idx]:
+                T[n] = 1
+            else:
+                T[n] = 0
     # ensure T[0]=0, T[1]=1 for o_1=3 etc.
     return T
 
+# -----------------------
+# Segmented and parallel sieve
+# -----------------------
+def sieve_T_segment(lo: int, hi: int, base_primes: List[int]) -> bytearray:
+    """
+    T[lo:hi] as a bytearray of 0/1, crossing off odd multiples of the base
+    primes (which must include every odd prime <= sqrt(2*hi - 1)).
+    """
+    seg = bytearray(b'\x01') * (hi - lo)
+    if lo == 0 and hi > 0:
+        seg[0] = 0  # o_0 = 1 is not prime
+    for p in base_primes:
+        if p < 3:
+            continue
+        start = (p*p - 1)//2
+        if start >= hi:
+            break
+        if start < lo:
+            start += ((lo - start + p - 1)//p) * p
+        first = start - lo
+        seg[first::p] = bytes(len(range(first, hi - lo, p)))
+    return seg
+
+
+_shared = {}
+
+
+def _attach_worker(shm_name: str, base_primes: List[int]) -> None:
+    # Pool initializer: base primes arrive once per worker, not per segment.
+    # Pool children share the parent's resource tracker, so attaching here
+    # does not add a second owner; the parent unlinks the block.
+    _shared['shm'] = shared_memory.SharedMemory(name=shm_name)
+    _shared['primes'] = base_primes
+
+
+def _sieve_into_shared(bounds: Tuple[int, int]) -> int:
+    lo, hi = bounds
+    _shared['shm'].buf[lo:hi] = sieve_T_segment(lo, hi, _shared['primes'])
+    return hi - lo
+
+
+class SharedT:
+    """
+    T[0..N] held in a shared-memory block. buf is a zero-copy memoryview of
+    N+1 bytes (numpy.frombuffer(buf, numpy.uint8) wraps it without copying).
+    close() releases and unlinks the block; views derived from buf must be
+    released first. Also usable as a context manager.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, size: int):
+        self._shm = shm
+        self.buf = shm.buf[:size]
+
+    def close(self) -> None:
+        if self._shm is None:
+            return
+        self.buf.release()
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self) -> "SharedT":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+@instrumented("T_sieve_parallel")
+def T_sieve_parallel(N: int, workers: Optional[int] = None, segment_size: int = 1 << 24) -> SharedT:
+    """
+    T[0..N] as a SharedT whose bytes equal bytes(T_via_sieve(N)).
+    The index range is cut into segments sieved by `workers` processes
+    (default: all cores), each writing its segment directly into one
+    shared-memory buffer, which is returned without copying (peak memory
+    N+1 bytes). Base primes <= sqrt(2N+1) are computed once and handed to
+    every worker at start-up.
+    """
+    size = N + 1
+    with phase("base_primes"):
+        base_primes = primes_upto(int(math.isqrt(2*N + 1)))
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    try:
+        segments = [(lo, min(lo + segment_size, size)) for lo in range(0, size, segment_size)]
+        with phase("sieve"):
+            with mp.Pool(workers, initializer=_attach_worker, initargs=(shm.name, base_primes)) as pool:
+                for done in pool.imap_unordered(_sieve_into_shared, segments):
+                    add_items(done)
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        raise
+    return SharedT(shm, size)
+
+_BITS_ASCII = bytes.maketrans(b'\x00\x01', b'01')
+
+
+def pack_bits(seg: bytes) -> bytes:
+    """
+    Pack 0/1 bytes into bits, 8 per byte, least significant bit first
+    (numpy.packbits(..., bitorder='little')); a trailing partial byte is
+    zero-padded.
+    """
+    if not seg:
+        return b''
+    word = int(bytes(seg[::-1]).translate(_BITS_ASCII), 2)
+    return word.to_bytes((len(seg) + 7) // 8, 'little')
+
 # -----------------------
 # Convenience: print small table
 # -----------------------
-def show_T_sample(N: int, method: str = 'sieve', p_max: int = None) -> None:
+def show_T_sample(N: int, method: str = 'sieve', p_max: int = None, store: str = None) -> None:
     if method == 'sieve':
-        T = T_via_sieve(N)
+        # an on-disk T store (store or $TRUE_STRING_T_STORE) only sieves what it lacks
+        from t_store import load_T
+        T = load_T(N, store)
     elif method == 'progression':
         T = progression_marking_T(N, p_max)
     else:
@@ -1,12 +1,18 @@
 import os
+import sys
 import pickle
 from sympy import isprime
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+from true_string_collision import row_spans
+from instrumentation import instrumented, phase, add_items, add_io_bytes, enable as enable_profiling
+
 class TrueStringGenerator:
     def __init__(self, state_file='true_string_state.pkl'):
         self.T = {}  # key: value, value: either number or 0 if collision
         self.max_m = -1
         self.max_n = -1
+        self.pending = None  # (target_m, target_n, symmetric, first row) of an unfinished symmetric run
         self.state_file = state_file
         self.load_state()
 
@@ -14,34 +20,64 @@ class TrueStringGenerator:
         return 4 + 3*m + 3*n + 2*m*n
 
     def save_state(self):
-        with open(self.state_file, 'wb') as f:
-            pickle.dump((self.T, self.max_m, self.max_n), f)
+        with phase("checkpoint"):
+            with open(self.state_file, 'wb') as f:
+                pickle.dump((self.T, self.max_m, self.max_n, self.pending), f)
+                add_io_bytes(f.tell())
 
     def load_state(self):
         if os.path.exists(self.state_file):
             with open(self.state_file, 'rb') as f:
-                self.T, self.max_m, self.max_n = pickle.load(f)
+                state = pickle.load(f)
+            self.T, self.max_m, self.max_n = state[:3]
+            self.pending = state[3] if len(state) > 3 else None
         else:
             self.T = {}
             self.max_m = -1
             self.max_n = -1
+            self.pending = None
 
-    def generate_up_to(self, target_m, target_n):
-        for m in range(self.max_m + 1, target_m + 1):
-            for n in range(0, target_n + 1):
-                val = self.f(m, n)
-                if val not in self.T:
-                    self.T[val] = val
-                else:
-                    self.T[val] = 0
+    @instrumented("generate_up_to")
+    def generate_up_to(self, target_m, target_n, symmetric=False):
+        # symmetric=True visits only n >= m for rows whose mirror (n, m) is
+        # also being generated; a mirrored cell counts twice, so it is a
+        # collision outright. Rows from earlier calls are mirrored directly.
+        # An interrupted symmetric run has already stored the mirrors of its
+        # remaining rows, so it is finished to its own bounds first, and its
+        # rows keep being mirrored from the row it started at.
+        if self.pending is not None and self.pending[:3] != (target_m, target_n, symmetric):
+            pending_m, pending_n = self.pending[:2]
+            self.generate_up_to(pending_m, pending_n, symmetric=True)
+        m_start = self.max_m + 1
+        run_start = m_start if self.pending is None else self.pending[3]
+        if symmetric and m_start <= target_m:
+            self.pending = (target_m, target_n, True, run_start)
+        for m in range(m_start, target_m + 1):
+            if symmetric:
+                spans = row_spans(m, target_m, target_n, run_start)
+            else:
+                spans = [(0, target_n, 1)]
+            with phase("enumerate"):
+                for n_lo, n_hi, weight in spans:
+                    for n in range(n_lo, n_hi + 1):
+                        val = self.f(m, n)
+                        if val not in self.T and weight == 1:
+                            self.T[val] = val
+                        else:
+                            self.T[val] = 0
+                    add_items(n_hi - n_lo + 1)
             self.max_n = target_n  # Update max_n fully for this m
             self.max_m = m
+            if m == target_m:
+                self.pending = None
             self.save_state()  # Save after each m iteration
 
     def get_sorted_T(self):
         return [(k, self.T[k], isprime(k)) for k in sorted(self.T.keys())]
 
 if __name__ == "__main__":
+    if "--profile" in sys.argv[1:]:
+        enable_profiling("jsonl", os.environ.get("TRUE_STRING_PROFILE_OUT") or None)
     generator = TrueStringGenerator()
     # Example: generate up to m=100, n=100
     generator.generate_up_to(100, 100)
@@ -0,0 +1,196 @@
+# t_stats.py
+# One-pass statistics over T (T[n] = 1 iff o_n = 2n+1 is prime) computed on
+# packed bits with popcounts instead of walking a Python list:
+#   - residue classes: number of primes o_n = 2n+1 <= 2N+1 in each class mod q
+#   - windowed densities: primes per block of indices, combined into sliding
+#     windows
+#   - gap distribution: histogram of index gaps between consecutive primes
+#     o_n (the prime gap is twice the index gap)
+#
+# A chunk of T is packed into one Python int (bit k = T[lo+k]), so every
+# mask/shift/popcount below runs over machine words in C:
+#   residues: the indices n = c (mod P) form a repunit mask in base 2**P;
+#             popcount(x & (mask << shift)) counts a whole class at once
+#             (P = q for odd q, q/2 for even q, since 2n+1 mod q has that period)
+#   gaps    : run_g holds primes with no prime among the next g-1 indices;
+#             popcount(run_g & (x >> g)) is the number of gaps equal to g and
+#             run_{g+1} = run_g ^ that, so the loop stops after the largest gap
+# Chunks are consumed in order from any source: T_via_sieve/segments, the
+# on-disk T store, or the packed T_bits.npy bitset written by the exporter.
+
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from spectral_t_utils import pack_bits
+from t_store import iter_T_chunks
+
+
+def _repunit(period: int, nbits: int) -> int:
+    """Int with bits 0, period, 2*period, ... set, covering at least nbits bits."""
+    mask = 1
+    length = period
+    while length < nbits:
+        mask |= mask << length
+        length *= 2
+    return mask
+
+
+class TStats:
+    def __init__(self, moduli: Sequence[int] = (), block: int = 0, gaps: bool = True):
+        """
+        moduli: residue moduli q; block: index block size for densities
+        (a multiple of 8, 0 to skip); gaps: collect the gap histogram.
+        """
+        if block % 8:
+            raise ValueError("block must be a multiple of 8")
+        self.moduli = list(moduli)
+        self.block = block
+        self.gaps = gaps
+        self.total = 0
+        self.length = 0
+        self.residue_counts: Dict[int, List[int]] = {q: [0] * q for q in self.moduli}
+        self.block_counts: List[int] = []
+        self.gap_hist: Dict[int, int] = {}
+        self._last: Optional[int] = None
+        self._masks: Dict[int, int] = {}
+        self._mask_bits = 0
+
+    def update(self, lo: int, seg: bytes) -> None:
+        """Consume T[lo:lo+len(seg)] given as 0/1 bytes."""
+        self.update_packed(lo, pack_bits(seg), len(seg))
+
+    def update_packed(self, lo: int, packed: bytes, nbits: int) -> None:
+        """Consume nbits of T starting at index lo, packed LSB-first."""
+        if lo != self.length or lo % 8:
+            raise ValueError("chunks must be contiguous and start at a multiple of 8")
+        x = int.from_bytes(packed, "little")
+        if nbits % 8:
+            x &= (1 << nbits) - 1
+        self.length += nbits
+        self.total += x.bit_count()
+        if self.moduli:
+            self._residues(lo, x, nbits)
+        if self.block:
+            self._blocks(lo, packed, nbits)
+        if self.gaps and x:
+            self._gap_scan(lo, x)
+
+    def _residues(self, lo: int, x: int, nbits: int) -> None:
+        if nbits + max(self.moduli) > self._mask_bits:
+            self._masks.clear()
+            self._mask_bits = nbits + max(self.moduli)
+        ones = x.bit_count()
+        for q in self.moduli:
+            period = q if q % 2 else q // 2
+            base = self._masks.get(period)
+            if base is None:
+                base = self._masks[period] = _repunit(period, self._mask_bits)
+            counts = self.residue_counts[q]
+            rest = ones
+            for c in range(1, period):
+                hits = (x & (base << ((c - lo) % period))).bit_count()
+                counts[(2*c + 1) % q] += hits
+                rest -= hits
+            counts[1 % q] += rest  # class c = 0 is whatever is left
+
+    def _blocks(self, lo: int, packed: bytes, nbits: int) -> None:
+        pos = lo
+        end_all = lo + nbits
+        while pos < end_all:
+            end = min((pos // self.block + 1) * self.block, end_all)
+            cnt = int.from_bytes(packed[(pos - lo) // 8:(end - lo + 7) // 8], "little")
+            if (end - lo) % 8:
+                cnt &= (1 << (end - pos)) - 1
+            cnt = cnt.bit_count()
+            if pos % self.block == 0:
+                self.block_counts.append(cnt)
+            else:
+                self.block_counts[-1] += cnt
+            pos = end
+
+    def _gap_scan(self, lo: int, x: int) -> None:
+        hist = self.gap_hist
+        first = (x & -x).bit_length() - 1
+        last = x.bit_length() - 1
+        if self._last is not None:
+            g = lo + first - self._last
+            hist[g] = hist.get(g, 0) + 1
+        self._last = lo + last
+        run = x ^ (1 << last)  # every remaining prime has a successor in x
+        g = 1
+        while run:
+            hits = run & (x >> g)
+            if hits:
+                hist[g] = hist.get(g, 0) + hits.bit_count()
+                run ^= hits
+            g += 1
+
+    def densities(self, window: int, step: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        (start index, primes per index) for windows of `window` indices every
+        `step` indices (default: tumbling); both multiples of the block size.
+        The last block may be partial.
+        """
+        step = step or window
+        if not self.block or window % self.block or step % self.block:
+            raise ValueError("window and step must be multiples of the block size")
+        k = window // self.block
+        s = step // self.block
+        prefix = [0]
+        for c in self.block_counts:
+            prefix.append(prefix[-1] + c)
+        out = []
+        for i in range(0, len(self.block_counts) - k + 1, s):
+            start = i * self.block
+            width = min(window, self.length - start)
+            out.append((start, (prefix[i + k] - prefix[i]) / width))
+        return out
+
+    def gap_buckets(self) -> List[int]:
+        """gap_hist as a list indexed by index gap (0 unused)."""
+        if not self.gap_hist:
+            return []
+        out = [0] * (max(self.gap_hist) + 1)
+        for g, c in self.gap_hist.items():
+            out[g] = c
+        return out
+
+
+def T_statistics(N: int, moduli: Sequence[int] = (), block: int = 0, gaps: bool = True,
+                 chunk: int = 1 << 22, store_path: Optional[str] = None) -> TStats:
+    """TStats over T[0..N] in one streamed pass (sieved or from the T store)."""
+    if chunk % 8:
+        raise ValueError("chunk must be a multiple of 8")
+    stats = TStats(moduli, block, gaps)
+    for lo, seg in iter_T_chunks(N, chunk, store_path):
+        stats.update(lo, seg)
+    return stats
+
+
+def packed_chunks(path: str, nbits: Optional[int] = None,
+                  chunk_bytes: int = 1 << 20) -> Iterable[Tuple[int, bytes, int]]:
+    """
+    Yield (lo, packed, nbits) from a T_bits.npy bitset (columnar_export.py),
+    memory-mapped; nbits defaults to the count N+1 recorded next to it in
+    T_bits.json, else to every stored bit.
+    """
+    import numpy as np
+    bits = np.load(path, mmap_mode="r")
+    if nbits is None:
+        meta = os.path.splitext(path)[0] + ".json"
+        if os.path.exists(meta):
+            with open(meta) as fh:
+                nbits = json.load(fh)["nbits"]
+    total = 8 * len(bits) if nbits is None else nbits
+    for b in range(0, (total + 7) // 8, chunk_bytes):
+        packed = bits[b:b + chunk_bytes].tobytes()
+        yield 8 * b, packed, min(8 * len(packed), total - 8 * b)
+
+
+def stats_from_bitset(path: str, moduli: Sequence[int] = (), block: int = 0, gaps: bool = True,
+                      nbits: Optional[int] = None) -> TStats:
+    stats = TStats(moduli, block, gaps)
+    for lo, packed, n in packed_chunks(path, nbits):
+        stats.update_packed(lo, packed, n)
+    return stats
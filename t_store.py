@@ -0,0 +1,165 @@
+# t_store.py
+# Persistent, extendable on-disk store of T[0..N] (T[n] = 1 iff 2n+1 is prime).
+#
+# File layout:
+#   bytes 0..7   magic b"TSTORE01"
+#   bytes 8..15  published length L = N+1 (little-endian uint64)
+#   bytes 16..31 reserved
+#   bytes 32..   T[0], T[1], ... one byte (0/1) per index
+# Sidecar files: <path>.primes caches the base primes (limit + uint64 array),
+# <path>.lock serialises writers.
+#
+# extend(N2) sieves only the new segment (N, N2] with the cached base primes,
+# appends it, fsyncs, and only then publishes the new length with a single
+# 8-byte write. Readers look at the published length first and never read
+# past it; bytes below the published length are never rewritten, so readers
+# keep seeing a consistent prefix while a writer extends. A crash between
+# append and publish leaves an unpublished tail, discarded by the next extend.
+
+import os
+import math
+import struct
+import tempfile
+from array import array
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: single-writer use only
+    fcntl = None
+
+from spectral_t_utils import T_via_sieve, primes_upto, sieve_T_segment
+
+MAGIC = b"TSTORE01"
+HEADER_SIZE = 32
+ENV_VAR = "TRUE_STRING_T_STORE"
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+class TStore:
+    def __init__(self, path: str):
+        self.path = path
+        if not os.path.exists(path):
+            with self._locked():
+                if not os.path.exists(path):  # not created meanwhile by another process
+                    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+                    os.fchmod(fd, 0o666 & ~_UMASK)  # mkstemp creates 0600; the store is shared
+                    with os.fdopen(fd, "wb") as fh:
+                        fh.write(MAGIC + struct.pack("<Q", 0) + bytes(HEADER_SIZE - 16))
+                    os.replace(tmp, path)
+        with open(path, "rb") as fh:
+            if fh.read(8) != MAGIC:
+                raise ValueError(f"{path} is not a T store")
+
+    @property
+    def N(self) -> int:
+        """Largest published index (-1 for an empty store)."""
+        return self._length() - 1
+
+    @contextmanager
+    def _locked(self):
+        """Hold the writer lock (<path>.lock)."""
+        with open(self.path + ".lock", "a+b") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _length(self) -> int:
+        with open(self.path, "rb") as fh:
+            fh.seek(8)
+            return struct.unpack("<Q", fh.read(8))[0]
+
+    def read(self, lo: int = 0, hi: Optional[int] = None) -> bytes:
+        """T[lo:hi] as bytes, clamped to the published prefix."""
+        length = self._length()
+        hi = length if hi is None else min(hi, length)
+        if lo >= hi:
+            return b""
+        with open(self.path, "rb") as fh:
+            fh.seek(HEADER_SIZE + lo)
+            return fh.read(hi - lo)
+
+    def iter_chunks(self, lo: int = 0, hi: Optional[int] = None,
+                    chunk: int = 1 << 24) -> Iterator[Tuple[int, bytes]]:
+        """Yield (start, T[start:start+chunk]) over the published [lo, hi)."""
+        length = self._length()
+        hi = length if hi is None else min(hi, length)
+        with open(self.path, "rb") as fh:
+            for start in range(lo, hi, chunk):
+                fh.seek(HEADER_SIZE + start)
+                yield start, fh.read(min(chunk, hi - start))
+
+    def T(self, N: int) -> List[int]:
+        """T[0..N] as a list, extending the store first if needed."""
+        self.extend(N)
+        return list(self.read(0, N + 1))
+
+    def extend(self, N2: int, segment_size: int = 1 << 24) -> None:
+        """Grow the store to cover T[0..N2], sieving only the missing indices."""
+        if N2 < self._length():
+            return
+        with self._locked():
+            with open(self.path, "r+b") as fh:
+                fh.seek(8)
+                length = struct.unpack("<Q", fh.read(8))[0]
+                if N2 < length:
+                    return  # another writer got there first
+                fh.truncate(HEADER_SIZE + length)
+                base_primes = self._base_primes(int(math.isqrt(2*N2 + 1)))
+                fh.seek(HEADER_SIZE + length)
+                for lo in range(length, N2 + 1, segment_size):
+                    fh.write(sieve_T_segment(lo, min(lo + segment_size, N2 + 1), base_primes))
+                fh.flush()
+                os.fsync(fh.fileno())
+                fh.seek(8)
+                fh.write(struct.pack("<Q", N2 + 1))
+                fh.flush()
+                os.fsync(fh.fileno())
+
+    def _base_primes(self, limit: int) -> List[int]:
+        """Primes <= limit, served from (and grown into) the .primes sidecar."""
+        side = self.path + ".primes"
+        if os.path.exists(side):
+            with open(side, "rb") as fh:
+                cached_limit = struct.unpack("<Q", fh.read(8))[0]
+                if cached_limit >= limit:
+                    primes = array("Q")
+                    primes.frombytes(fh.read())
+                    return [p for p in primes if p <= limit]
+        primes = primes_upto(limit)
+        tmp = side + ".tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(struct.pack("<Q", limit))
+            fh.write(array("Q", primes).tobytes())
+        os.replace(tmp, side)
+        return primes
+
+
+def iter_T_chunks(N: int, chunk: int = 1 << 22,
+                  store_path: Optional[str] = None) -> Iterator[Tuple[int, bytes]]:
+    """
+    Yield (lo, T[lo:lo+chunk]) for T[0..N] in order, read from the store at
+    store_path (or $TRUE_STRING_T_STORE) or sieved segment by segment.
+    """
+    store_path = store_path or os.environ.get(ENV_VAR)
+    if store_path:
+        store = TStore(store_path)
+        store.extend(N)
+        yield from store.iter_chunks(0, N + 1, chunk)
+        return
+    base_primes = primes_upto(int(math.isqrt(2 * N + 1)))
+    for lo in range(0, N + 1, chunk):
+        yield lo, sieve_T_segment(lo, min(lo + chunk, N + 1), base_primes)
+
+
+def load_T(N: int, store_path: Optional[str] = None) -> List[int]:
+    """
+    T[0..N] from the store at store_path (or $TRUE_STRING_T_STORE), extending
+    it as needed; falls back to T_via_sieve(N) when no store is configured.
+    """
+    store_path = store_path or os.environ.get(ENV_VAR)
+    if not store_path:
+        return T_via_sieve(N)
+    return TStore(store_path).T(N)